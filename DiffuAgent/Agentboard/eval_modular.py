@@ -51,6 +51,7 @@ def parse_args():
     parser.add_argument("--project_name", default='', help="Wandb project name")
     parser.add_argument("--baseline_dir", default='', help="Baseline directory for comparison")
     parser.add_argument("--max_num_steps", type=int, default=30, help="Max steps per episode")
+    parser.add_argument("--num_workers", type=int, default=0, help="Episodes evaluated concurrently (0 = use config, default 1)")
     parser.add_argument("--continue_exp", default='', help="Continue from existing results")
     parser.add_argument("--legacy", action="store_true", help="Force legacy config loading")
 
@@ -139,6 +140,8 @@ def load_config(cfg_path, args):
         run_config["wandb"] = True
     if args.max_num_steps:
         run_config["max_num_steps"] = args.max_num_steps
+    if args.num_workers:
+        run_config["num_workers"] = args.num_workers
 
     return llm_config, agent_config, env_config, run_config, llm_config_all
 
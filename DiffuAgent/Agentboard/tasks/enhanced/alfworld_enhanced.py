@@ -87,6 +87,9 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
 
         self.agent.task_id = f"alfworld_{index}"
         self.agent.reset(goal=goal, init_obs=init_ob, env=self.env)
+        memory_display = self.resolve_memory_display()
+        # exit_flag is (re)set by agents with verification during reset
+        has_exit_flag = hasattr(self.agent, "exit_flag")
 
         logger.goal("Example {} | Goal: {}".format(index, self.agent.goal))
         init_prompt_dict = copy.deepcopy(self.prompts)
@@ -96,7 +99,7 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
         done = False
         grounding_acc_count = 0
         score_change_record = []
-        logger.info("Step {:02} - Message: {}".format(0, init_ob))
+        logger.info("Step %02d - Message: %s", 0, init_ob)
 
         # Initialize token counting
         token_cnt = 0
@@ -109,7 +112,7 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
 
         for i in range(0, self.max_num_steps):
             # Log memory if available
-            self.log_memory_if_available(i, logger)
+            self.log_memory_if_available(i, logger, memory_display)
 
             success, action = self.agent.run(init_prompt_dict=init_prompt_dict)
 
@@ -120,7 +123,7 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
                 )
                 token_cnt += _token
 
-            if not success or getattr(self.agent, "exit_flag", False) is True:
+            if not success or (has_exit_flag and self.agent.exit_flag is True):
                 exit_reason = "early_exit"
                 break
 
@@ -128,19 +131,19 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
             if action in self.env.get_action_space():
                 grounding_acc_count += 1.0
 
-            logger.info("Step {:02} - Action: {}".format(i, action))
-            trajectory.append({"Action": action, "id": i})
+            logger.info("Step %02d - Action: %s", i, action)
+            trajectory.add("Action", i, action)
 
             observation, reward, done, info = self.env.step(action)
-            logger.info("Step {:02} - Observation: {}".format(i, observation))
+            logger.info("Step %02d - Observation: %s", i, observation)
 
             if "Task accomplished!" in observation and reward < 1.0:
                 raise Exception("Task accomplished error")
 
-            logger.info("Step {:02} - Progress Rate: {}\n".format(i, reward))
+            logger.info("Step %02d - Progress Rate: %s\n", i, reward)
 
-            trajectory.append({"Observation": observation, "id": i})
-            trajectory.append({"Progress Rate": reward, "id": i})
+            trajectory.add("Observation", i, observation)
+            trajectory.add("Progress Rate", i, reward)
 
             if reward > last_reward:
                 score_change_record.append((i, reward))
@@ -154,17 +157,12 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
                     "goal": self.agent.goal,
                     "difficulty": self.env.difficulty
                 }
-                extra_details.update({
-                    "steps": i + 1,
-                    "avg_tokens": token_cnt / (i + 1),
-                    "exit_reason": "success",
-                })
-                self.agentboard.log_example(
-                    index, True, reward, grounding_acc_count / (i + 1),
-                    score_change_record, env_details, trajectory, extra=extra_details
+                grounding_acc = self._finalize_episode(
+                    index, True, reward, i, token_cnt, grounding_acc_count,
+                    score_change_record, env_details, trajectory, extra_details, "success"
                 )
 
-                return 1.0, True, grounding_acc_count / (i + 1), score_change_record, i
+                return 1.0, True, grounding_acc, score_change_record, i
 
         # Handle unsuccessful scenario
         game_name = self.env.cur_task_name.split('/')[0]
@@ -174,25 +172,17 @@ class EvalalfworldEnhanced(BaseEnhancedTask):
             "difficulty": self.env.difficulty
         }
 
-        progress_rate = reward
-
         try:
             example_prompt = self.agent.get_example_prompt()
         except:
             example_prompt = None
 
-        extra_details.update({
-            "steps": i + 1,
-            "avg_tokens": token_cnt / (i + 1),
-            "exit_reason": exit_reason,
-        })
-
-        self.agentboard.log_example(
-            index, done, progress_rate, grounding_acc_count / (i + 1),
-            score_change_record, env_details, trajectory, example_prompt, extra=extra_details
+        grounding_acc = self._finalize_episode(
+            index, done, reward, i, token_cnt, grounding_acc_count,
+            score_change_record, env_details, trajectory, extra_details, exit_reason, example_prompt
         )
 
-        return progress_rate, done, grounding_acc_count / (i + 1), score_change_record, i
+        return reward, done, grounding_acc, score_change_record, i
 
     def evaluate(self):
         """Evaluate all AlfWorld examples."""
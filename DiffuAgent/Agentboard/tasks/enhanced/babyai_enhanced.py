@@ -9,8 +9,17 @@ This enhanced version includes:
 - Difficulty-based metrics (hard/easy)
 """
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from llm import load_llm
 from agents import load_agent
 from environment import load_environment
@@ -18,10 +27,12 @@ from common.registry import registry
 
 from utils.logging.logger import TaskLogger
 from utils.logging.agent_logger import AgentLogger
-from .base_enhanced import BaseEnhancedTask
+from .base_enhanced import BaseEnhancedTask, buffered_episode_logs
 
 logger = AgentLogger(__name__)
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 @registry.register_task("babyai_enhanced")
 class EvalBabyaiEnhanced(BaseEnhancedTask):
@@ -35,13 +46,18 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
                  max_num_steps=20,
                  llm=None,
                  baseline_dir=None,
-                 log_path=None):
+                 log_path=None,
+                 num_workers=1):
         super().__init__()
 
         # Initialize llm and agent
         if llm is None:
             llm = load_llm(llm_name, llm_config)
+        self.llm = llm
+        self.agent_name = agent_name
+        self.agent_config = agent_config
         self.agent = load_agent(agent_name, agent_config, llm)
+        self.num_workers = num_workers
 
         self.env_num_per_task = env_config.get("env_num_per_task", 1)
         self.seed = env_config.get("seed", 1234)
@@ -65,19 +81,22 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
         """Load annotation file with subgoals and difficulty."""
         all_annotations = []
         difficulty = []
-        with open(path, 'r') as f:
-            for line in f:
-                if line.strip() == '':
+        # Lines share the same columns, so the subgoal keys are resolved once per key set
+        subgoal_keys = {}
+        with open(path, 'rb') as f:
+            for raw in f:
+                if not raw.strip():
                     continue
-                line = json.loads(line.strip())
+                line = _json_loads(raw)
                 if "subgoals" in line and "subgoals_1" not in line:
                     all_annotations.append(line["subgoals"])
                 else:
-                    annotation = []
-                    for key in line:
-                        if "subgoals" in key:
-                            annotation.append(line[key])
-                    all_annotations.append(annotation)
+                    columns = tuple(line)
+                    keys = subgoal_keys.get(columns)
+                    if keys is None:
+                        keys = [key for key in columns if "subgoals" in key]
+                        subgoal_keys[columns] = keys
+                    all_annotations.append([line[key] for key in keys])
 
                 if "difficulty" in line:
                     difficulty.append(line["difficulty"])
@@ -97,33 +116,44 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
 
     def get_all_environment_configs(self):
         """Generate all environment configurations."""
-        iter_num = 0
-        env_configs = []
         self.seeds = range(self.seed, self.seed + self.env_num_per_task)
         obs_to_reward_list, difficulties = self.load_annotation(self.label_path)
-        assert len(self.game_level) * self.env_num_per_task == len(obs_to_reward_list)
-        for level in self.game_level:
-            for seed in self.seeds:
-                env_configs.append({
-                    "game_level": level,
-                    "seed": seed,
-                    "obs_to_reward": obs_to_reward_list[iter_num],
-                    "difficulty": difficulties[iter_num]
-                })
-                iter_num += 1
-        return env_configs
-
-    def evaluate_env(self, id):
-        """Evaluate a single environment instance."""
-
-        env = load_environment("babyai", self.env_configs[id])
+        num_envs = len(self.game_level) * self.env_num_per_task
+        if num_envs != len(obs_to_reward_list):
+            raise ValueError(
+                f"Annotation file {self.label_path} has {len(obs_to_reward_list)} entries, "
+                f"expected {num_envs} ({len(self.game_level)} levels x {self.env_num_per_task} envs)"
+            )
+        return [
+            {
+                "game_level": level,
+                "seed": seed,
+                "obs_to_reward": obs_to_reward_list[i],
+                "difficulty": difficulties[i]
+            }
+            for i, (level, seed) in enumerate(product(self.game_level, self.seeds))
+        ]
+
+    def build_worker(self):
+        """Build an extra agent for concurrent evaluation (envs are created per episode)."""
+        return load_agent(self.agent_name, self.agent_config, self.llm)
+
+    def evaluate_env(self, id, agent=None, env=None):
+        """Evaluate a single environment instance (env is built from its config unless given)."""
+        agent = self.agent if agent is None else agent
+        if env is None:
+            env = load_environment("babyai", self.env_configs[id])
+
         init_obs = env._get_obs()
         goal = env._get_goal()
-        self.agent.task_id = f"babyai_{id}"
-        self.agent.reset(goal, init_obs)
+        agent.task_id = f"babyai_{id}"
+        agent.reset(goal, init_obs)
+        memory_display = self.resolve_memory_display(agent)
+        # exit_flag is (re)set by agents with verification during reset
+        has_exit_flag = hasattr(agent, "exit_flag")
 
-        logger.goal("Example {} | Goal: {}".format(id, self.agent.goal))
-        logger.info("Step {:02} - Message: {}".format(0, init_obs))
+        logger.goal("Example {} | Goal: {}".format(id, agent.goal))
+        logger.info("Step %02d - Message: %s", 0, init_obs)
 
         max_steps = self.max_num_steps
         reward = 0
@@ -141,9 +171,9 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
 
         for step_id in range(max_steps):
             # Log memory if available
-            self.log_memory_if_available(step_id, logger)
+            self.log_memory_if_available(step_id, logger, memory_display)
 
-            success, action = self.agent.run()
+            success, action = agent.run()
 
             # Process dict action (with token and thought)
             if isinstance(action, dict):
@@ -152,21 +182,21 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
                 )
                 token_cnt += _token
 
-            if not success or getattr(self.agent, "exit_flag", False) is True:
+            if not success or (has_exit_flag and agent.exit_flag is True):
                 exit_reason = "early_exit"
                 break
 
             if isinstance(action, tuple):
-                logger.info("Step {:02} - Thought: {}".format(step_id, action[-1]))
+                logger.info("Step %02d - Thought: %s", step_id, action[-1])
                 action = action[0]
 
-            logger.info("Step {:02} - Action: {}".format(step_id, action))
-            trajectory.append({"Action": action, "id": step_id})
+            logger.info("Step %02d - Action: %s", step_id, action)
+            trajectory.add("Action", step_id, action)
 
             state, reward, done, infos = env.step(action)
 
-            trajectory.append({"Observation": state, "id": step_id})
-            trajectory.append({"Progress Rate": reward, "id": step_id})
+            trajectory.add("Observation", step_id, state)
+            trajectory.add("Progress Rate", step_id, reward)
 
             if infos.get("action_is_valid", False):
                 grounding_acc_count += 1
@@ -175,53 +205,40 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
                 score_change_record.append((step_id, reward))
             last_reward = reward
 
-            logger.info("Step {:02} - Observation: {}".format(step_id, state))
-            logger.info("Step {:02} - Progress Rate: {}\n".format(step_id, reward))
+            logger.info("Step %02d - Observation: %s", step_id, state)
+            logger.info("Step %02d - Progress Rate: %s\n", step_id, reward)
 
-            self.agent.update(action, state)
+            agent.update(action, state)
 
             if done:
-                progress_rate = reward
-
                 env_details = {
                     "task_name": env.game_name,
-                    "goal": self.agent.goal,
+                    "goal": agent.goal,
                     "difficulty": env.difficulty
                 }
-                extra_details.update({
-                    "steps": step_id + 1,
-                    "avg_tokens": token_cnt / (step_id + 1),
-                    "exit_reason": "success",
-                })
-                self.agentboard.log_example(
-                    id, True, progress_rate, grounding_acc_count / (step_id + 1),
-                    score_change_record, env_details, trajectory, extra=extra_details
+                grounding_acc = self._finalize_episode(
+                    id, True, reward, step_id, token_cnt, grounding_acc_count,
+                    score_change_record, env_details, trajectory, extra_details, "success"
                 )
 
-                return True, progress_rate, step_id + 1, grounding_acc_count / (step_id + 1), score_change_record
+                return True, reward, step_id + 1, grounding_acc, score_change_record
 
         env_details = {
-            "goal": self.agent.goal,
+            "goal": agent.goal,
             "task_name": env.game_name,
             "difficulty": env.difficulty
         }
         try:
-            example_prompt = self.agent.get_example_prompt()
+            example_prompt = agent.get_example_prompt()
         except:
             example_prompt = None
 
-        progress_rate = reward
-        extra_details.update({
-            "steps": step_id + 1,
-            "avg_tokens": token_cnt / (step_id + 1),
-            "exit_reason": exit_reason,
-        })
-        self.agentboard.log_example(
-            id, False, progress_rate, grounding_acc_count / (step_id + 1),
-            score_change_record, env_details, trajectory, example_prompt, extra=extra_details
+        grounding_acc = self._finalize_episode(
+            id, False, reward, step_id, token_cnt, grounding_acc_count,
+            score_change_record, env_details, trajectory, extra_details, exit_reason, example_prompt
         )
 
-        return False, progress_rate, step_id + 1, grounding_acc_count / (step_id + 1), score_change_record
+        return False, reward, step_id + 1, grounding_acc, score_change_record
 
     def evaluate(self):
         """Evaluate all BabyAI examples."""
@@ -232,19 +249,44 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
         grounding_accs = []
         difficulties = []
 
-        for id in range(num_envs):
-            success, progress_rate, steps, grounding_acc_count, score_change_record = self.evaluate_env(id)
-            all_progress_rates.append(progress_rate)
-            grounding_accs.append(grounding_acc_count)
-            score_state_records.append(score_change_record)
-            difficulties.append(self.env_configs[id]["difficulty"])
-
-            if success:
-                success_rate.append(1)
-            else:
-                success_rate.append(0)
+        # Environments are built on a loader thread ahead of the episodes
+        # consuming them, so setup overlaps with LLM-bound episode time.
+        # The look-ahead is bounded: taking config i queues loads only up to
+        # config i + lookahead, so loaded envs cannot pile up in memory.
+        lookahead = max(1, self.num_workers)
+        with ThreadPoolExecutor(max_workers=1) as loader:
+            pending_envs = {}
+            pending_lock = threading.Lock()
+            next_load = 0
+
+            def run_episode(id, agent):
+                nonlocal next_load
+                with pending_lock:
+                    last_load = min(id + lookahead, num_envs - 1)
+                    while next_load <= last_load:
+                        pending_envs[next_load] = loader.submit(
+                            load_environment, "babyai", self.env_configs[next_load]
+                        )
+                        next_load += 1
+                    future = pending_envs.pop(id)
+                env = future.result()
+                with buffered_episode_logs(logger):
+                    return self.evaluate_env(id, agent=agent, env=env)
+
+            results = self.map_episodes(run_episode, range(num_envs), self.agent)
+            for id, result in enumerate(results):
+                success, progress_rate, steps, grounding_acc_count, score_change_record = result
+                all_progress_rates.append(progress_rate)
+                grounding_accs.append(grounding_acc_count)
+                score_state_records.append(score_change_record)
+                difficulties.append(self.env_configs[id]["difficulty"])
+
+                if success:
+                    success_rate.append(1)
+                else:
+                    success_rate.append(0)
 
-            logger.finish("Example {} | Success: {} , Progress Rate: {} , Steps: {}\n".format(id, success, progress_rate, steps))
+                logger.finish("Example {} | Success: {} , Progress Rate: {} , Steps: {}\n".format(id, success, progress_rate, steps))
 
         # Calculate all metrics
         metrics = self.calculate_difficulty_metrics(success_rate, all_progress_rates, grounding_accs, difficulties)
@@ -279,6 +321,7 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
         llm_name = llm_config.get("name", "gpt")
         agent_name = agent_config.get("name", "POMDPAgent")
         log_path = run_config.get("log_path", None)
+        num_workers = run_config.get("num_workers", 1)
 
         return cls(
             llm_name=llm_name,
@@ -289,5 +332,6 @@ class EvalBabyaiEnhanced(BaseEnhancedTask):
             max_num_steps=max_num_steps,
             llm=llm,
             baseline_dir=baseline_dir,
-            log_path=log_path
+            log_path=log_path,
+            num_workers=num_workers
         )
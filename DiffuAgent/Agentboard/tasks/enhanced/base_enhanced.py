@@ -7,14 +7,121 @@ This module provides common functionality for enhanced task implementations incl
 - Token/Thought tracking
 - Memory logging
 - Difficulty-based metrics
+- Concurrent episode evaluation
 """
 import copy
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from ..base_task import BaseTask
 from utils.logging.logger import TaskLogger
 from utils.logging.agent_logger import AgentLogger
 
 logger = AgentLogger(__name__)
 
+_install_lock = threading.Lock()
+
+
+class EpisodeLogBuffer(logging.Handler):
+    """
+    Logging handler that holds the records of a running episode and hands them
+    to the logger's real handlers in one batch when the episode ends.
+
+    Buffers are thread-local, so concurrent episodes each flush a contiguous
+    block. Outside an episode records are passed through immediately.
+    """
+
+    def __init__(self, targets):
+        super().__init__()
+        self.targets = list(targets)
+        self._local = threading.local()
+
+    def emit(self, record):
+        records = getattr(self._local, "records", None)
+        if records is None:
+            self._dispatch([record])
+        else:
+            records.append(record)
+
+    def begin(self):
+        """Start buffering records emitted by the current thread."""
+        self._local.records = []
+
+    def end(self):
+        """Stop buffering and write out everything collected by the current thread."""
+        records, self._local.records = getattr(self._local, "records", None), None
+        if records:
+            self._dispatch(records)
+
+    def _dispatch(self, records):
+        # Records go through each target's handle() so its filters, lock, lazy stream
+        # opening (FileHandler(delay=True)) and handleError() behave as usual; holding
+        # this handler's (reentrant) lock keeps every episode's batch contiguous.
+        with self.lock:
+            for target in self.targets:
+                for r in records:
+                    if r.levelno >= target.level:
+                        target.handle(r)
+
+
+class TrajectoryBuffer:
+    """
+    Episode trajectory stored as parallel columns (kind, step id, content).
+
+    Entries are appended without allocating a dict per item; the
+    [{kind: content, "id": step_id}, ...] records expected by TaskLogger are
+    only built by to_records() when the episode is logged.
+    """
+
+    __slots__ = ("kinds", "step_ids", "contents")
+
+    def __init__(self):
+        self.kinds = []
+        self.step_ids = []
+        self.contents = []
+
+    def add(self, kind, step_id, content):
+        """Append one trajectory entry, e.g. add("Action", 3, "go north")."""
+        self.kinds.append(kind)
+        self.step_ids.append(step_id)
+        self.contents.append(content)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def to_records(self):
+        """Materialize the trajectory in TaskLogger's list-of-dicts format."""
+        return [
+            {kind: content, "id": step_id}
+            for kind, step_id, content in zip(self.kinds, self.step_ids, self.contents)
+        ]
+
+
+@contextmanager
+def buffered_episode_logs(task_logger):
+    """
+    Buffer task_logger output for the duration of one episode.
+
+    On first use the logger's handlers are moved behind an EpisodeLogBuffer;
+    log call sites are unchanged.
+    """
+    with _install_lock:
+        buffer = next((h for h in task_logger.handlers if isinstance(h, EpisodeLogBuffer)), None)
+        if buffer is None:
+            buffer = EpisodeLogBuffer(task_logger.handlers)
+            for handler in buffer.targets:
+                task_logger.removeHandler(handler)
+            task_logger.addHandler(buffer)
+
+    buffer.begin()
+    try:
+        yield
+    finally:
+        buffer.end()
+
 
 class BaseEnhancedTask(BaseTask):
     """
@@ -27,8 +134,12 @@ class BaseEnhancedTask(BaseTask):
     - Dynamic memory logging
     - Difficulty-based metrics (hard/easy)
     - Exit reason tracking
+    - Concurrent episode evaluation (run_config `num_workers`)
     """
 
+    # Number of episodes evaluated concurrently (1 = sequential)
+    num_workers = 1
+
     def setup_logger(self, task_name, log_path, max_num_steps, baseline_dir):
         """
         Initialize TaskLogger for the task.
@@ -48,22 +159,82 @@ class BaseEnhancedTask(BaseTask):
             max_num_steps=max_num_steps,
             baseline_dir=baseline_dir
         )
+        self._log_lock = threading.Lock()
         return self.agentboard
 
+    def log_example(self, *args, **kwargs):
+        """
+        Forward an episode record to TaskLogger.
+
+        TaskLogger appends to shared files and draws with pyplot, so records
+        coming from concurrent episodes are serialized here.
+        """
+        with self._log_lock:
+            self.agentboard.log_example(*args, **kwargs)
+
+    def build_worker(self):
+        """
+        Build the per-episode mutable state (agent, env, ...) of one extra worker.
+
+        Only called when num_workers > 1; tasks supporting concurrent
+        evaluation must override it.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support num_workers > 1")
+
+    def map_episodes(self, fn, jobs, worker):
+        """
+        Evaluate fn(job, worker) for every job and yield the results in job order.
+
+        With a single worker episodes run inline. Otherwise they are dispatched
+        to a thread pool (episode wall time is dominated by blocking LLM
+        requests), and every in-flight episode owns a worker so agent and env
+        state is never shared between episodes. Agents only expose a blocking
+        run(), so num_workers is also the cap on concurrent LLM requests.
+
+        Args:
+            fn: Callable(job, worker) evaluating one episode
+            jobs: Iterable of episode descriptions
+            worker: Worker used for the first slot (typically the task's own agent/env)
+
+        Yields:
+            fn results, in the order of jobs
+        """
+        jobs = list(jobs)
+        if self.num_workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield fn(job, worker)
+            return
+
+        num_workers = min(self.num_workers, len(jobs))
+        idle = queue.SimpleQueue()
+        idle.put(worker)
+        for _ in range(num_workers - 1):
+            idle.put(self.build_worker())
+
+        def run(job):
+            slot = idle.get()
+            try:
+                return fn(job, slot)
+            finally:
+                idle.put(slot)
+
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            yield from pool.map(run, jobs)
+
     def init_trajectory(self, goal, init_ob):
         """
-        Initialize trajectory list with goal and initial observation.
+        Initialize trajectory with goal and initial observation.
 
         Args:
             goal: Task goal/description
             init_ob: Initial observation from environment
 
         Returns:
-            List: Initialized trajectory
+            TrajectoryBuffer: Initialized trajectory
         """
-        trajectory = []
-        trajectory.append({"Goal": goal, "id": 0})
-        trajectory.append({"Observation": init_ob, "id": 0})
+        trajectory = TrajectoryBuffer()
+        trajectory.add("Goal", 0, goal)
+        trajectory.add("Observation", 0, init_ob)
         return trajectory
 
     def action_dict_process(self, action, step_id, trajectory, logger, extra_details):
@@ -79,33 +250,83 @@ class BaseEnhancedTask(BaseTask):
         Args:
             action: Action dict with keys 'token', 'action', 'thought', 'response'
             step_id: Current step ID
-            trajectory: Trajectory list to append to
+            trajectory: TrajectoryBuffer to append to
             logger: Logger instance
             extra_details: Dict to store extra information (like exit_details)
 
         Returns:
             tuple: (token_count, action_string)
         """
-        trajectory.append({"Thought": action['thought'], "id": step_id})
-        trajectory.append({"Token": action['token'], "id": step_id})
-        logger.info("Step {:02} - Thought: {}".format(step_id, action['thought']))
+        trajectory.add("Thought", step_id, action['thought'])
+        trajectory.add("Token", step_id, action['token'])
+        logger.info("Step %02d - Thought: %s", step_id, action['thought'])
         extra_details['exit_details'] = action['response']
 
         # Restore action
         return action['token'], action['action']
 
-    def log_memory_if_available(self, step_id, logger):
+    def resolve_memory_display(self, agent=None):
+        """
+        Resolve the agent's dynamic memory display method once per episode.
+
+        DynamicMemory is rebuilt by agent.reset(), so call this after reset.
+
+        Args:
+            agent: Agent of the running episode (defaults to self.agent)
+
+        Returns:
+            Bound dynamic_memory.display, or None if the agent has no dynamic memory
+        """
+        agent = self.agent if agent is None else agent
+        return getattr(getattr(agent, "dynamic_memory", None), "display", None)
+
+    def log_memory_if_available(self, step_id, logger, memory_display):
         """
         Log agent's dynamic memory if available.
 
         Args:
             step_id: Current step ID
             logger: Logger instance
+            memory_display: Result of resolve_memory_display() for this episode
+        """
+        if memory_display is not None:
+            logger.info("Mem - %s", memory_display())
+
+    def _finalize_episode(self, index, is_done, reward, step_id, token_cnt, grounding_acc_count,
+                          score_change_record, env_details, trajectory, extra_details,
+                          exit_reason, example_prompt=None):
         """
-        try:
-            logger.info(f"Mem - {self.agent.dynamic_memory.display()}")
-        except:
-            pass
+        Compute the per-episode metrics and log the example.
+
+        Args:
+            index: Example index
+            is_done: Whether the episode succeeded
+            reward: Final progress rate
+            step_id: ID of the last executed step
+            token_cnt: Total tokens used in the episode
+            grounding_acc_count: Number of valid actions
+            score_change_record: List of (step_id, reward) progress changes
+            env_details: Dict with task_name, goal and difficulty
+            trajectory: TrajectoryBuffer of the episode
+            extra_details: Dict of extra information, completed in place
+            exit_reason: "success", "early_exit" or "max_steps"
+            example_prompt: Agent example prompt (logged for unsuccessful episodes)
+
+        Returns:
+            float: Grounding accuracy of the episode
+        """
+        num_steps = step_id + 1
+        grounding_acc = grounding_acc_count / num_steps
+        extra_details.update({
+            "steps": num_steps,
+            "avg_tokens": token_cnt / num_steps,
+            "exit_reason": exit_reason,
+        })
+        self.log_example(
+            index, is_done, reward, grounding_acc,
+            score_change_record, env_details, trajectory.to_records(), example_prompt, extra=extra_details
+        )
+        return grounding_acc
 
     def calculate_difficulty_metrics(self, srs, scores, grounding_accs, difficulties):
         """
@@ -127,30 +348,24 @@ class BaseEnhancedTask(BaseTask):
                 - easy_sr: Easy task success rate
                 - easy_pr: Easy task progress rate
         """
-        sr = sum(srs) * 1.0 / len(srs)
-        pr = sum(scores) * 1.0 / len(scores)
-        gr = sum(grounding_accs) * 1.0 / len(grounding_accs)
-
-        # Calculate hard task metrics
-        hard_sr = [sr for sr, difficulty in zip(srs, difficulties) if difficulty == "hard"]
-        hard_sr = sum(hard_sr) / len(hard_sr) if len(hard_sr) > 0 else 0
-
-        hard_pr = [pr for pr, difficulty in zip(scores, difficulties) if difficulty == "hard"]
-        hard_pr = sum(hard_pr) / len(hard_pr) if len(hard_pr) > 0 else 0
+        srs = np.asarray(srs, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        grounding_accs = np.asarray(grounding_accs, dtype=np.float64)
+        difficulties = np.asarray(difficulties)
 
-        # Calculate easy task metrics
-        easy_sr = [sr for sr, difficulty in zip(srs, difficulties) if difficulty == "easy"]
-        easy_sr = sum(easy_sr) / len(easy_sr) if len(easy_sr) > 0 else 0
+        # One mask per difficulty level, shared by the success and progress rates
+        hard_mask = difficulties == "hard"
+        easy_mask = difficulties == "easy"
 
-        easy_pr = [pr for pr, difficulty in zip(scores, difficulties) if difficulty == "easy"]
-        easy_pr = sum(easy_pr) / len(easy_pr) if len(easy_pr) > 0 else 0
+        def masked_mean(values, mask):
+            return float(values[mask].mean()) if mask.any() else 0
 
         return {
-            "sr": sr,
-            "pr": pr,
-            "gr": gr,
-            "hard_sr": hard_sr,
-            "hard_pr": hard_pr,
-            "easy_sr": easy_sr,
-            "easy_pr": easy_pr
+            "sr": float(srs.mean()),
+            "pr": float(scores.mean()),
+            "gr": float(grounding_accs.mean()),
+            "hard_sr": masked_mean(srs, hard_mask),
+            "hard_pr": masked_mean(scores, hard_mask),
+            "easy_sr": masked_mean(srs, easy_mask),
+            "easy_pr": masked_mean(scores, easy_mask)
         }
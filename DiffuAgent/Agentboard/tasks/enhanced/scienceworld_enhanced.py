@@ -16,7 +16,7 @@ from environment import load_environment
 from common.registry import registry
 
 from utils.logging.agent_logger import AgentLogger
-from .base_enhanced import BaseEnhancedTask
+from .base_enhanced import BaseEnhancedTask, buffered_episode_logs
 
 logger = AgentLogger(__name__)
 
@@ -37,6 +37,9 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
 
         if llm is None:
             llm = load_llm(llm_name, llm_config)
+        self.llm = llm
+        self.agent_name = agent_name
+        self.agent_config = agent_config
         self.agent = load_agent(agent_name, agent_config, llm)
         self.simplefied = env_config.get("simplefied", False)
         seed = env_config.get("seed", 42)
@@ -45,6 +48,7 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
         self.env_cfg = env_config
 
         self.max_num_steps = run_config.get("max_num_steps", 30)
+        self.num_workers = run_config.get("num_workers", 1)
         self.context_length = llm_config.get("context_length")
 
         self.baseline_dir = baseline_dir
@@ -70,19 +74,30 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
         """Set random seed for reproducibility."""
         random.seed(seed)
 
-    def evaluate_env(self, index, task_name, var, modified_goal):
-        """Evaluate a single environment instance."""
-
-        self.env.load(task_name, var, simplificationStr=self.simplification_str)
-        initialObs, initialDict = self.env.reset()
-        init_obs = initialObs + f"\n{self.env.inventory()}"
+    def build_worker(self):
+        """Build an extra (agent, env) pair for concurrent evaluation."""
+        agent = load_agent(self.agent_name, self.agent_config, self.llm)
+        env = load_environment("scienceworld", self.env_cfg)
+        return agent, env
 
-        self.agent.task_id = f"scienceworld_{index}"
-        self.agent.reset(goal=modified_goal, init_obs=init_obs, env=self.env)
+    def evaluate_env(self, index, task_name, var, modified_goal, agent=None, env=None):
+        """Evaluate a single environment instance."""
+        agent = self.agent if agent is None else agent
+        env = self.env if env is None else env
+
+        env.load(task_name, var, simplificationStr=self.simplification_str)
+        initialObs, initialDict = env.reset()
+        init_obs = initialObs + f"\n{env.inventory()}"
+
+        agent.task_id = f"scienceworld_{index}"
+        agent.reset(goal=modified_goal, init_obs=init_obs, env=env)
+        memory_display = self.resolve_memory_display(agent)
+        # exit_flag is (re)set by agents with verification during reset
+        has_exit_flag = hasattr(agent, "exit_flag")
         reward = 0.
         last_reward = 0.
 
-        logger.info("Step {:02} - Observation: {}".format(0, init_obs))
+        logger.info("Step %02d - Observation: %s", 0, init_obs)
         grounding_acc_count = 0
         score_change_record = []
         isDone = False
@@ -97,9 +112,9 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
 
         for i in range(self.max_num_steps):
             # Log memory if available
-            self.log_memory_if_available(i, logger)
+            self.log_memory_if_available(i, logger, memory_display)
 
-            success, action = self.agent.run()
+            success, action = agent.run()
 
             # Process dict action (with token and thought)
             if isinstance(action, dict):
@@ -108,22 +123,22 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
                 )
                 token_cnt += _token
 
-            logger.info("Step {:02} - Action: {}".format(i, action))
-            trajectory.append({"Action": action, "id": i})
+            logger.info("Step %02d - Action: %s", i, action)
+            trajectory.add("Action", i, action)
 
-            if not success or getattr(self.agent, "exit_flag", False) is True:
+            if not success or (has_exit_flag and agent.exit_flag is True):
                 exit_reason = "early_exit"
                 break
 
-            observation, reward, isDone, info = self.env.step(action)
-            if action in self.env.get_action_space(abstract=False):
+            observation, reward, isDone, info = env.step(action)
+            if action in env.get_action_space(abstract=False):
                 grounding_acc_count += 1
 
-            logger.info("Step {:02} - Observation: {}".format(i, observation))
-            logger.info("Step {:02} - Progress Rate: {}\n".format(i, reward))
+            logger.info("Step %02d - Observation: %s", i, observation)
+            logger.info("Step %02d - Progress Rate: %s\n", i, reward)
 
-            trajectory.append({"Observation": observation, "id": i})
-            trajectory.append({"Progress Rate": reward, "id": i})
+            trajectory.add("Observation", i, observation)
+            trajectory.add("Progress Rate", i, reward)
 
             if reward > last_reward:
                 score_change_record.append((i, reward))
@@ -132,47 +147,34 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
             if isDone:
                 env_details = {
                     "task_name": task_name,
-                    "goal": self.agent.goal,
-                    "difficulty": self.env.difficulty
+                    "goal": agent.goal,
+                    "difficulty": env.difficulty
                 }
-                extra_details.update({
-                    "steps": i + 1,
-                    "avg_tokens": token_cnt / (i + 1),
-                    "exit_reason": "success",
-                })
-                self.agentboard.log_example(
-                    index, True, 1.0, grounding_acc_count / (i + 1),
-                    score_change_record, env_details, trajectory, extra=extra_details
+                grounding_acc = self._finalize_episode(
+                    index, True, 1.0, i, token_cnt, grounding_acc_count,
+                    score_change_record, env_details, trajectory, extra_details, "success"
                 )
 
-                return 1.0, True, grounding_acc_count / (i + 1), score_change_record, i
+                return 1.0, True, grounding_acc, score_change_record, i
 
-            self.agent.update(action=action, state=observation)
+            agent.update(action=action, state=observation)
 
         env_details = {
             "task_name": task_name,
-            "goal": self.agent.goal,
-            "difficulty": self.env.difficulty
+            "goal": agent.goal,
+            "difficulty": env.difficulty
         }
         try:
-            example_prompt = self.agent.get_example_prompt()
+            example_prompt = agent.get_example_prompt()
         except:
             example_prompt = None
 
-        progress_rate = reward
-
-        extra_details.update({
-            "steps": i + 1,
-            "avg_tokens": token_cnt / (i + 1),
-            "exit_reason": exit_reason,
-        })
-
-        self.agentboard.log_example(
-            index, isDone, progress_rate, grounding_acc_count / (i + 1),
-            score_change_record, env_details, trajectory, example_prompt, extra=extra_details
+        grounding_acc = self._finalize_episode(
+            index, isDone, reward, i, token_cnt, grounding_acc_count,
+            score_change_record, env_details, trajectory, extra_details, exit_reason, example_prompt
         )
 
-        return progress_rate, isDone, grounding_acc_count / (i + 1), score_change_record, i
+        return reward, isDone, grounding_acc, score_change_record, i
 
     def evaluate(self):
         """Evaluate all ScienceWorld examples."""
@@ -186,17 +188,25 @@ class EvalScienceworldEnhanced(BaseEnhancedTask):
         srs = []
         difficulties = []
 
-        for index, (k, v) in enumerate(labels.items()):
+        def run_episode(job, worker):
+            index, v = job
+            agent, env = worker
             task_name = v["task_name"]
             var = v["var"]
             modified_goal = v["modified_goal"]
 
-            logger.goal("Example {} | Goal: {}".format(index, f"task_name: {task_name}, var: {var}, {modified_goal}"))
-            score, done, grounding_acc, score_change_record, num_steps = self.evaluate_env(
-                index, task_name, var, modified_goal
-            )
+            with buffered_episode_logs(logger):
+                logger.goal("Example {} | Goal: {}".format(index, f"task_name: {task_name}, var: {var}, {modified_goal}"))
+                result = self.evaluate_env(
+                    index, task_name, var, modified_goal, agent=agent, env=env
+                )
+            return result, env.difficulty
+
+        results = self.map_episodes(run_episode, enumerate(labels.values()), (self.agent, self.env))
+        for index, (result, difficulty) in enumerate(results):
+            score, done, grounding_acc, score_change_record, num_steps = result
 
-            difficulties.append(self.env.difficulty)
+            difficulties.append(difficulty)
             logger.finish("Example {} | Success: {} , Progress Rate: {} , Steps: {}\n".format(index, done, score, num_steps + 1))
             count += 1
             if done:
@@ -1,6 +1,7 @@
 import wandb
 import os
 import json
+import math
 import re
 import logging
 import plotly
@@ -11,6 +12,40 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _finite_or_none(value):
+    """Copy of value with NaN/inf floats replaced by None, as orjson writes them (null)."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite_or_none(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(v) for v in value]
+    return value
+
+
+def dumps_sample_record(record):
+    """
+    Serialize a detailed sample record to indented, newline-terminated JSON bytes.
+
+    NaN and infinities are written as null by both the orjson and the json path.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                record,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            # orjson rejects some types json.dumps accepts (e.g. int subclasses)
+            pass
+    return (json.dumps(_finite_or_none(record), indent=2, allow_nan=False) + '\n').encode("utf-8")
+
 
 class SummaryLogger:
     def __init__(self, log_path, baseline_dir= "data/baseline_results"):
@@ -511,8 +546,10 @@ class TaskLogger:
         if example_prompt is not None:
             sample_result["example_prompt"] = example_prompt
 
-        with open(self.log_path, "a+") as f:
-            f.write(json.dumps(sample_result, indent=2)+'\n')
+        # Serialize the whole record in memory, then append it with a single write
+        blob = dumps_sample_record(sample_result)
+        with open(self.log_path, "ab") as f:
+            f.write(blob)
     
     def save_sample_data_to_file_overview(self, id, is_done, reward, grounding_accuracy, score_change_record, env_details, trajectory):
         with open(self.log_summary_path, "a+") as f:
@@ -11,16 +11,19 @@ Example Usage:
     configs = add_diffuagent_model_configs()
 """
 
+from itertools import product
+
 from bfcl_eval.constants.model_config import ModelConfig
-from bfcl_eval.model_handler.api_inference.diffuagent import (
-    LLMHandler,
-    SelectorLLMHandler,
-    EditorLLMHandler,
-    SelectorEditorLLMHandler,
-    DLLMHandler,
-    SelectorDLLMHandler,
-    EditorDLLMHandler,
-    SelectorEditorDLLMHandler,
+
+
+# Fields shared by every DiffuAgent config
+_BASE_CONFIG_KW = dict(
+    org="External LLM",
+    license="Apache 2.0",
+    input_price=None,
+    output_price=None,
+    is_fc_model=False,
+    underscore_to_dot=False,
 )
 
 
@@ -30,13 +33,8 @@ def build_config(config_name: str, url: str, model_handler) -> ModelConfig:
         model_name=config_name,
         display_name=config_name,
         url=url,
-        org="External LLM",
-        license="Apache 2.0",
         model_handler=model_handler,
-        input_price=None,
-        output_price=None,
-        is_fc_model=False,
-        underscore_to_dot=False,
+        **_BASE_CONFIG_KW,
     )
 
 
@@ -47,6 +45,18 @@ def add_diffuagent_model_configs():
     Returns:
         dict: Mapping of config names to ModelConfig objects
     """
+    # Handlers pull in the inference backends; import them only when configs are built
+    from bfcl_eval.model_handler.api_inference.diffuagent import (
+        LLMHandler,
+        SelectorLLMHandler,
+        EditorLLMHandler,
+        SelectorEditorLLMHandler,
+        DLLMHandler,
+        SelectorDLLMHandler,
+        EditorDLLMHandler,
+        SelectorEditorDLLMHandler,
+    )
+
     # LLM models
     LLM_MODELS = {
         "ministral": {
@@ -82,42 +92,40 @@ def add_diffuagent_model_configs():
     # DLLM variants (wedlm removed as requested)
     DLLM_VARIANTS = ["llada", "dream", "fdllmv2", "dllmvar"]
 
-    configs = {}
-
-    # Generate configurations
-    for setting_key, handlers in AGENT_HANDLERS.items():
-        prefix = f"diffuagent-{setting_key}"
+    # (config_name, url, handler role) for every setting
+    entries = []
+    for setting_key in AGENT_HANDLERS:
+        prefix = "diffuagent-" + setting_key
 
         # LLM-only: "{prefix}/{llm_display_name}"
-        for llm_info in LLM_MODELS.values():
-            config_name = f"{prefix}/{llm_info['display_name']}"
-            configs[config_name] = build_config(
-                config_name=config_name,
-                url=llm_info["url"],
-                model_handler=handlers["llm"],
-            )
+        entries.extend(
+            (setting_key, "/".join((prefix, llm_info["display_name"])), llm_info["url"], "llm")
+            for llm_info in LLM_MODELS.values()
+        )
 
         # LLM + DLLM: "{prefix}/{llm_display_name}-{dllm_variant}"
         # Uses dllm handler (main agent = LLM, features = DLLM)
-        for llm_info in LLM_MODELS.values():
-            for dllm_variant in DLLM_VARIANTS:
-                config_name = f"{prefix}/{llm_info['display_name']}-{dllm_variant}"
-                configs[config_name] = build_config(
-                    config_name=config_name,
-                    url=llm_info["url"],
-                    model_handler=handlers["dllm"],
-                )
+        entries.extend(
+            (setting_key, "/".join((prefix, llm_info["display_name"] + "-" + dllm_variant)), llm_info["url"], "dllm")
+            for llm_info, dllm_variant in product(LLM_MODELS.values(), DLLM_VARIANTS)
+        )
 
         # Pure DLLM: "{prefix}/{dllm_variant}"
         # For all settings (chatbase, selector-chatbase, editor-chatbase, selector-editor-chatbase)
         # Uses the same handler class (e.g., SelectorDLLMHandler for selector-chatbase)
-        for dllm_variant in DLLM_VARIANTS:
-            config_name = f"{prefix}/{dllm_variant}"
-            configs[config_name] = build_config(
-                config_name=config_name,
-                url="",
-                model_handler=handlers["dllm"],
-            )
+        entries.extend(
+            (setting_key, "/".join((prefix, dllm_variant)), "", "dllm")
+            for dllm_variant in DLLM_VARIANTS
+        )
+
+    configs = {
+        config_name: build_config(
+            config_name=config_name,
+            url=url,
+            model_handler=AGENT_HANDLERS[setting_key][role],
+        )
+        for setting_key, config_name, url, role in entries
+    }
 
     print(f"Generated {len(configs)} DiffuAgent configurations")
     return configs
@@ -32,16 +32,20 @@ Usage:
     )
 """
 
-from bfcl_eval.model_handler.api_inference.diffuagent.handlers import (
-    LLMHandler,
-    SelectorLLMHandler,
-    EditorLLMHandler,
-    SelectorEditorLLMHandler,
-    DLLMHandler,
-    SelectorDLLMHandler,
-    EditorDLLMHandler,
-    SelectorEditorDLLMHandler,
-)
+import importlib
+
+# Handler classes are resolved on first attribute access (PEP 562), so importing
+# the package or one of its submodules does not pull in every handler variant.
+_LAZY_IMPORTS = {
+    "LLMHandler": "handlers",
+    "SelectorLLMHandler": "handlers",
+    "EditorLLMHandler": "handlers",
+    "SelectorEditorLLMHandler": "handlers",
+    "DLLMHandler": "handlers",
+    "SelectorDLLMHandler": "handlers",
+    "EditorDLLMHandler": "handlers",
+    "SelectorEditorDLLMHandler": "handlers",
+}
 
 __all__ = [
     "LLMHandler",
@@ -53,3 +57,16 @@ __all__ = [
     "EditorDLLMHandler",
     "SelectorEditorDLLMHandler",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -6,12 +6,21 @@ It provides common functionality for batch inference, error handling, and prompt
 """
 
 import os
+import sys
 import json
+import time
+import atexit
+import logging
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Literal, Any
-from datetime import datetime
 from tqdm import tqdm
 from overrides import EnforceOverrides, final, override
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from bfcl_eval.constants.eval_config import RESULT_PATH
 from bfcl_eval.constants.enums import ModelStyle, ReturnFormat
@@ -35,6 +44,54 @@ from bfcl_eval.model_handler.api_inference.utils.debug_utils import debug
 
 BackendType = Literal["llm", "dllm"]
 
+logger = logging.getLogger(__name__)
+
+# Model names whose configuration banner has been printed in this process
+_printed_configs = set()
+
+# Serializes appends to the inference log when test cases run concurrently
+_log_lock = threading.Lock()
+
+# Inference log records are buffered and flushed every LOG_FLUSH_EVERY records
+# (and at the end of batch_inference / interpreter exit)
+LOG_FLUSH_EVERY = 64
+LOG_BUFFER_SIZE = 1 << 16
+
+# Open inference log files by path; handlers of the same model share one handle
+_log_files = {}
+
+
+def _close_log_files():
+    """Close every inference log file (registered once with atexit)."""
+    with _log_lock:
+        for log_file in _log_files.values():
+            log_file.close()
+        _log_files.clear()
+
+
+atexit.register(_close_log_files)
+
+# (epoch second, formatted local time) of the last inference log timestamp
+_last_log_timestamp = (0, "")
+
+
+def _log_timestamp() -> str:
+    """Local "%Y-%m-%d %H:%M:%S" timestamp, formatted at most once per second."""
+    global _last_log_timestamp
+    now = int(time.time())
+    second, text = _last_log_timestamp
+    if second != now:
+        text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        _last_log_timestamp = (now, text)
+    return text
+
+
+def _estimate_test_case_length(test_case: dict) -> int:
+    """Rough size of a test case for scheduling: prompt characters plus a per-turn allowance."""
+    question = test_case.get("question") or []
+    num_turns = len(question) if "multi_turn" in test_case["id"] else 1
+    return len(json.dumps(question, ensure_ascii=False)) + 512 * num_turns
+
 
 class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
     """
@@ -56,6 +113,10 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
     - EditorMixin: Add format editing capability
     """
 
+    # Which features the concrete handler class provides; set to True by the mixins
+    _has_selector = False
+    _has_editor = False
+
     def __init__(
         self,
         model_name: str,
@@ -129,10 +190,21 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
         # Support both new naming (FEATURES_*) and legacy naming (DLLM_API_KEY)
         self.dllm_api_key = os.getenv("FEATURES_API_KEY") or os.getenv("DLLM_API_KEY", None)
         self.dllm_base_url = os.getenv("FEATURES_BASE_URL") or os.getenv("DLLM_BASE_URL", None)
+        # Optional local DLLM checkpoint, used only for its tokenizer
+        self.dllm_model_path = os.getenv("FEATURES_MODEL_PATH") or os.getenv("DLLM_MODEL_PATH", None)
+        # Optional local checkpoint of the main model, read by _ensure_backend_initialized
+        # Support both new naming (MAIN_AGENT_MODEL_PATH) and legacy naming (VLLM_MODEL_PATH)
+        self.local_model_path = os.getenv("MAIN_AGENT_MODEL_PATH") or os.getenv("VLLM_MODEL_PATH", None)
+        # Stream main agent LLM responses (see ENV_CONFIG.md)
+        self.stream = os.getenv("DIFFUAGENT_STREAM", "0") == "1"
+        # Serve repeated deterministic requests from the in-process response cache (see ENV_CONFIG.md)
+        self.use_cache = os.getenv("DIFFUAGENT_CACHE", "0") == "1"
 
         # Backend instances (initialized in batch_inference)
         self.llm = None
         self.dllm = None
+        # Bound _query_llm / _query_dllm for the main backend, chosen in _initialize_backend
+        self._query_backend = None
 
         # Feature components (set by mixins)
         self.selector = None
@@ -141,7 +213,16 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
         # Initialize backend on first inference call
         self._backend_initialized = False
 
-        # Print configuration summary
+        # Inference log file from _log_files, opened on first write (see _log_inference)
+        self._log_file = None
+        self._log_pending = 0
+
+    def _print_config_once(self):
+        """Print the configuration and handler summary, once per model name and process."""
+        if self.model_name in _printed_configs:
+            return
+        _printed_configs.add(self.model_name)
+
         print(f"\n  🔧 DiffuAgent Configuration:")
         print(f"     ├─ Model Name: {self.model_name}")
         print(f"     ├─ Actual Model: {self.model_name.split('/')[-1]}")
@@ -155,7 +236,12 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
             print(f"     └─ DLLM Variant: {self.dllm_name}")
         else:
             print(f"     └─ DLLM Variant: None")
-        print()
+
+        print(f"\n  🔧 Handler Info: {self.__class__.__name__}")
+        print(f"     ├─ Selector: {'✓' if self._has_selector else '✗'}")
+        print(f"     ├─ Editor:   {'✓' if self._has_editor else '✗'}")
+        print(f"     ├─ Main Agent Backend: {self.backend.upper()}")
+        print(f"     └─ Feature Backend: {self.feature_backend.upper()}\n")
 
     def _extract_vllm_model_name(self, model_config_name: str) -> str:
         """
@@ -172,9 +258,8 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
     def _ensure_backend_initialized(self):
         """Initialize backend if not already initialized."""
         if not self._backend_initialized:
-            # Try to get local_model_path from environment first
-            # Support both new naming (MAIN_AGENT_MODEL_PATH) and legacy naming (VLLM_MODEL_PATH)
-            local_model_path = os.getenv("MAIN_AGENT_MODEL_PATH") or os.getenv("VLLM_MODEL_PATH", None)
+            # local_model_path comes from the environment (read once in __init__)
+            local_model_path = self.local_model_path
 
             # Only load tokenizer if we have a valid local_model_path
             # Otherwise skip tokenizer loading to avoid HuggingFace download
@@ -265,30 +350,40 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
         # Initialize features (selector, editor)
         self._initialize_features()
 
-        # Run inference
+        # Test cases are independent, so up to DIFFUAGENT_CONCURRENCY of them are
+        # kept in flight to let the servers batch their requests
+        concurrency = max(1, int(os.getenv("DIFFUAGENT_CONCURRENCY", "1")))
+
+        # With several cases in flight, dispatch them longest-first so that requests
+        # sharing a server batch have similar lengths and the run does not end on
+        # one long multi-turn straggler. Results carry their id, so order is free.
+        if concurrency > 1:
+            test_entries = sorted(test_entries, key=_estimate_test_case_length, reverse=True)
+
+        def run_test_case(test_case):
+            return self._multi_threaded_inference(
+                test_case,
+                include_input_log,
+                exclude_state_log,
+            )
+
+        # Run inference; results are written as soon as each test case finishes so a
+        # long multi-turn case does not hold back the ones queued after it
         with tqdm(
             total=len(test_entries),
             desc=f"Generating results for {self.model_name}",
-        ) as pbar:
-            for test_case in test_entries:
-                result = self._multi_threaded_inference(
-                    test_case,
-                    include_input_log,
-                    exclude_state_log,
-                )
-                self.write(result, result_dir, update_mode=update_mode)
+        ) as pbar, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(run_test_case, test_case) for test_case in test_entries]
+            for future in as_completed(futures):
+                self.write(future.result(), result_dir, update_mode=update_mode)
                 pbar.update()
 
+        self._flush_inference_log()
+
     def _initialize_backend(self):
         """Initialize the appropriate backend(s) based on configuration."""
-        # DEBUG: Show handler type and features
-        has_selector = hasattr(self, 'selector') and self.selector is not None
-        has_editor = hasattr(self, 'editor') and self.editor is not None
-        print(f"\n  🔧 Handler Info: {self.__class__.__name__}")
-        print(f"     ├─ Selector: {'✓' if has_selector else '✗'}")
-        print(f"     ├─ Editor:   {'✓' if has_editor else '✗'}")
-        print(f"     ├─ Main Agent Backend: {self.backend.upper()}")
-        print(f"     └─ Feature Backend: {self.feature_backend.upper()}\n")
+        # Show configuration, handler type and features
+        self._print_config_once()
 
         # Initialize main agent backend
         if self.backend == "llm":
@@ -310,10 +405,14 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
                 base_url=self.base_url,
                 api_key=self.api_key,
                 context_length=self.max_context_length,
+                tokenizer=self.tokenizer,
+                use_cache=self.use_cache,
             )
             self.llm.check_server_availability()
+            self._query_backend = self._query_llm
         elif self.backend == "dllm":
             self.dllm = self._check_and_init_dllm()
+            self._query_backend = self._query_dllm
         else:
             raise ValueError(f"Unknown main backend: {self.backend}")
 
@@ -337,6 +436,8 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
                         base_url=self.base_url,
                         api_key=self.api_key,
                         context_length=self.max_context_length,
+                        tokenizer=self.tokenizer,
+                        use_cache=self.use_cache,
                     )
                     self.llm.check_server_availability()
             else:
@@ -355,10 +456,20 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
         if not hasattr(self, 'dllm_name') or self.dllm_name is None:
             raise ValueError(f"DLLM name not set. Model: {self.model_name}")
 
+        # Count DLLM tokens locally when its checkpoint is available
+        dllm_tokenizer = None
+        if self.dllm_model_path and os.path.isdir(self.dllm_model_path):
+            _, dllm_tokenizer, _ = resolve_model_and_context_length(
+                local_model_path=self.dllm_model_path,
+                model_name_huggingface=self.dllm_model_path,
+            )
+
         dllm = REQUEST_DLLM(
             model_name=self.dllm_name,  # DLLM expects variant name like "Llada", "Dream"
             base_url=self.dllm_base_url,
             api_key=self.dllm_api_key,
+            tokenizer=dllm_tokenizer,
+            use_cache=self.use_cache,
         )
         try:
             dllm.check_server_availability()
@@ -385,16 +496,19 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
                     test_case, include_input_log
                 )
         except Exception as e:
+            # Format the traceback once; it is both reported and stored with the result
+            error_msg = str(e)
+            tb_str = traceback.format_exc()
             print("-" * 100)
             print(
                 "❗️❗️ Error occurred during inference. Maximum retries reached for rate limit or other error. Continuing to next test case."
             )
-            print(f"❗️❗️ Test case ID: {test_case['id']}, Error: {str(e)}")
-            traceback.print_exc(limit=10)
+            print(f"❗️❗️ Test case ID: {test_case['id']}, Error: {error_msg}")
+            sys.stderr.write(tb_str)
             print("-" * 100)
 
-            model_responses = f"Error during inference: {str(e)}"
-            metadata = {"traceback": traceback.format_exc()}
+            model_responses = f"Error during inference: {error_msg}"
+            metadata = {"traceback": tb_str}
 
         result_to_write = {
             "id": test_case["id"],
@@ -424,10 +538,10 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
         function: list[dict] = inference_data["function"]
         message: list[dict] = inference_data["message"]
 
-        # Print user message (only if not already printed by SelectorMixin)
-        has_selector = hasattr(self, 'selector') and self.selector is not None
-        if not has_selector:
-            print(f"  ▶ {message[-1]['role'].upper()}: {message[-1]['content']}")
+        # Log user message (only if not already logged by SelectorMixin)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug and not self._has_selector:
+            logger.debug("  ▶ %s: %s", message[-1]['role'].upper(), message[-1]['content'])
 
         # Filter messages (may be modified by mixins)
         message = self._filter_messages(message, function)
@@ -438,22 +552,19 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
 
         # Get token count and query backend
         # Don't use quiet mode - let backend wrappers show their debug output
-        if self.backend == "llm":
-            response = self._query_llm(message, quiet=False)
-        elif self.backend == "dllm":
-            response = self._query_dllm(message, function, quiet=False)
-        else:
-            raise ValueError(f"Unknown backend: {self.backend}")
+        response = self._query_backend(message, function, quiet=False)
 
-        # Print response
-        if "</think>" in response.text:
-            response.text = response.text.split("</think>", 1)[-1].strip()
-        print(f"  ✓ ASSISTANT: {response.text}\n")
+        # Log response
+        _, think_end, answer = response.text.partition("</think>")
+        if think_end:
+            response.text = answer.strip()
+        if debug:
+            logger.debug("  ✓ ASSISTANT: %s\n", response.text)
 
         # Log to file
         self._log_inference(formatted_prompt, response.json)
 
-        # Return response wrapper (SimpleNamespace) instead of response.object
+        # Return the response wrapper (LLMResponse / SimpleNamespace) instead of the raw body
         # This allows _parse_query_response_prompting to work with both LLM and DLLM
         return response, response.latency
 
@@ -467,8 +578,8 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
         # SelectorMixin overrides this to filter functions
         return messages
 
-    def _query_llm(self, messages, quiet: bool = False):
-        """Query LLM backend."""
+    def _query_llm(self, messages, function=None, quiet: bool = False):
+        """Query LLM backend. function is unused; it keeps the signature in line with _query_dllm."""
         input_token_count = self.llm.num_tokens_from_messages(messages=messages, quiet=True)
         leftover_tokens_count = calculate_leftover_tokens(
             self.max_context_length, input_token_count
@@ -479,6 +590,7 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
             temperature=self.temperature,
             max_tokens=leftover_tokens_count,
             quiet=quiet,
+            stream=self.stream,
         )
 
         return response
@@ -501,29 +613,47 @@ class DiffuagentBaseHandler(BaseHandler, EnforceOverrides):
             temperature=self.temperature,
             max_tokens=leftover_tokens_count,
             quiet=quiet,
+            input_tokens=input_token_count,
         )
 
         return response
 
     def _log_inference(self, formatted_prompt, response_json):
         """Log inference to file."""
-        logger_dir = os.path.join(os.environ["BFCL_PROJECT_ROOT"], "logger")
-        if os.path.exists(logger_dir) is False:
-            os.makedirs(logger_dir, exist_ok=True)
-        logger_path = os.path.join(
-            logger_dir, self.model_name.replace("/", "_") + ".jsonl"
-        )
-        with open(logger_path, "a", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "formatted_prompt": formatted_prompt,
-                    "response": response_json,
-                },
-                f,
-                ensure_ascii=False,
-            )
-            f.write("\n")
+        record = {
+            "timestamp": _log_timestamp(),
+            "formatted_prompt": formatted_prompt,
+            "response": response_json,
+        }
+        if orjson is not None:
+            line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        else:
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with _log_lock:
+            if self._log_file is None or self._log_file.closed:
+                logger_dir = os.path.join(os.environ["BFCL_PROJECT_ROOT"], "logger")
+                os.makedirs(logger_dir, exist_ok=True)
+                logger_path = os.path.join(
+                    logger_dir, self.model_name.replace("/", "_") + ".jsonl"
+                )
+                self._log_file = _log_files.get(logger_path)
+                if self._log_file is None:
+                    self._log_file = open(logger_path, "ab", buffering=LOG_BUFFER_SIZE)
+                    _log_files[logger_path] = self._log_file
+
+            self._log_file.write(line)
+            self._log_pending += 1
+            if self._log_pending >= LOG_FLUSH_EVERY:
+                self._log_file.flush()
+                self._log_pending = 0
+
+    def _flush_inference_log(self):
+        """Write out buffered inference log records."""
+        with _log_lock:
+            if self._log_file is not None and not self._log_file.closed:
+                self._log_file.flush()
+                self._log_pending = 0
 
     @override
     def _pre_query_processing_prompting(self, test_entry: dict) -> dict:
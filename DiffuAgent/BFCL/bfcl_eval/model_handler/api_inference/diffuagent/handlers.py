@@ -24,6 +24,10 @@ Examples:
 import json
 from typing import Any
 from overrides import override
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from bfcl_eval.model_handler.api_inference.diffuagent.base import DiffuagentBaseHandler
 from bfcl_eval.model_handler.api_inference.diffuagent.mixins import (
@@ -32,6 +36,21 @@ from bfcl_eval.model_handler.api_inference.diffuagent.mixins import (
     SelectorEditorMixin,
 )
 
+# Compact JSON text for DLLM prompts; the stdlib fallback uses the same separators
+# so the formatted prompt does not depend on whether orjson is installed
+if orjson is not None:
+    def _json_text(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+else:
+    def _json_text(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+# ("[ROLE]", "[/ROLE]") markers used by LLMHandler._format_prompt
+_ROLE_TAGS = {
+    role: (f"[{role.upper()}]", f"[/{role.upper()}]")
+    for role in ("system", "user", "assistant", "tool")
+}
+
 
 class LLMHandler(DiffuagentBaseHandler):
     """
@@ -56,11 +75,16 @@ class LLMHandler(DiffuagentBaseHandler):
     @override
     def _format_prompt(self, messages, function):
         """Format messages with simple role-based markers."""
-        formatted_prompt = ""
+        parts = []
         for m in messages:
-            role = m["role"].upper()
-            formatted_prompt += f"[{role}]" + m["content"] + f"[/{role}]"
-        return formatted_prompt
+            role = m["role"]
+            tags = _ROLE_TAGS.get(role)
+            if tags is None:
+                tags = (f"[{role.upper()}]", f"[/{role.upper()}]")
+            parts.append(tags[0])
+            parts.append(m["content"])
+            parts.append(tags[1])
+        return "".join(parts)
 
     @override
     def _add_execution_results_prompting(
@@ -100,14 +124,11 @@ class LLMHandler(DiffuagentBaseHandler):
 
         reasoning_content = ""
         cleaned_response = model_response
-        if "<|think|>" in model_response:
-            parts = model_response.split("<|think|>")
-            reasoning_content = (
-                parts[0].rstrip("\n").split("<|think|>")[-1].lstrip("\n")
-                if len(parts) > 1
-                else ""
-            )
-            cleaned_response = parts[-1].lstrip("\n")
+        head, sep, rest = model_response.partition("<|think|>")
+        if sep:
+            # Reasoning is the text before the first marker, the answer follows the last one
+            reasoning_content = head.strip("\n")
+            cleaned_response = rest.rpartition("<|think|>")[2].lstrip("\n")
 
         return {
             "model_responses": cleaned_response,
@@ -160,13 +181,34 @@ class DLLMHandler(DiffuagentBaseHandler):
         if self.dllm_name is None:
             raise ValueError(f"Unknown DLLM variant in model name: {self.model_name}")
 
+        # Serialized function schemas keyed by (id, len) of the tool list
+        self._function_json_cache = {}
+
+    def _function_json(self, function):
+        """
+        Serialize the function schema, reusing the result while the same tool
+        list is queried (every turn of a test case shares it).
+        """
+        key = (id(function), len(function))
+        cached = self._function_json_cache.get(key)
+        if cached is not None and cached[0] is function:
+            return cached[1]
+
+        function_json = _json_text(function)
+        if len(self._function_json_cache) >= 64:
+            self._function_json_cache.clear()
+        # Keep a reference so the id cannot be reused by another list
+        self._function_json_cache[key] = (function, function_json)
+        return function_json
+
     @override
     def _format_prompt(self, messages, function):
         """Format messages with function schema for DLLM."""
-        formatted_prompt = json.dumps({
-            "messages": messages,
-            "functions": function
-        }, ensure_ascii=False)
+        # Same layout as _json_text({"messages": ..., "functions": ...})
+        formatted_prompt = (
+            '{"messages":' + _json_text(messages)
+            + ',"functions":' + self._function_json(function) + "}"
+        )
         return formatted_prompt
 
 
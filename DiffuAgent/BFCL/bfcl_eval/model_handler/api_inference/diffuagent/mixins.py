@@ -8,6 +8,8 @@ This module contains mixin classes that add specific capabilities to the base ha
 These mixins should be used together in _query_prompting to ensure correct execution order.
 """
 
+import logging
+
 from bfcl_eval.model_handler.api_inference.utils.selector_utils import (
     Selector,
     filter_message,
@@ -15,8 +17,30 @@ from bfcl_eval.model_handler.api_inference.utils.selector_utils import (
 )
 from bfcl_eval.model_handler.api_inference.utils.fmeditor_utils import Format_Editor
 
+logger = logging.getLogger(__name__)
+
+
+class _BackendInfoMixin:
+    """Caches the (request_url, model_path) of the backend serving each feature role."""
+
+    def _cache_backend_info(self, role: str, backend: str):
+        """Resolve request info for role once; urls and model paths do not change at runtime."""
+        if backend == "llm":
+            info = (self.llm.urls["chat"], self.llm.model_path)
+        elif backend == "dllm":
+            info = (self.dllm.urls["generate"], self.dllm.model_name)
+        else:
+            info = ("Unknown", "Unknown")
+        if getattr(self, "_backend_info_cache", None) is None:
+            self._backend_info_cache = {}
+        self._backend_info_cache[role] = info
+
+    def _backend_info(self, role: str):
+        """Return (request_url, model_path) for "selector" or "editor"."""
+        return self._backend_info_cache.get(role, ("Unknown", "Unknown"))
+
 
-class SelectorMixin:
+class SelectorMixin(_BackendInfoMixin):
     """
     Mixin that adds function selection capability.
 
@@ -27,6 +51,8 @@ class SelectorMixin:
             pass
     """
 
+    _has_selector = True
+
     def _initialize_features(self):
         """Initialize the Selector component."""
         super()._initialize_features()
@@ -35,56 +61,53 @@ class SelectorMixin:
         if self.feature_backend == "llm":
             if self.llm is None:
                 raise ValueError("LLM backend not available for Selector")
-            self.selector = Selector(llm=self.llm)
+            self.selector = Selector(llm=self.llm, use_cache=self.use_cache)
             self._selector_backend = "llm"
         elif self.feature_backend == "dllm":
             if self.dllm is None:
                 raise ValueError(
                     f"DLLM backend not available for Selector (server may not be running on {self.dllm_base_url})"
                 )
-            self.selector = Selector(llm=self.dllm)
+            self.selector = Selector(llm=self.dllm, use_cache=self.use_cache)
             self._selector_backend = "dllm"
         else:
             raise ValueError(f"Unknown feature backend: {self.feature_backend}")
 
+        self._cache_backend_info("selector", self._selector_backend)
+
     def _query_prompting(self, inference_data: dict):
         """
         Query backend with selector (before chat_completion).
 
         Execution order:
-        1. Print user message
+        1. Log user message
         2. Run selector to filter relevant functions (BEFORE chat_completion)
         3. Call chat_completion to get response
         """
         function: list[dict] = inference_data["function"]
         message: list[dict] = inference_data["message"]
+        # Trace arguments (request info, reprs of large lists) are only built when enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-        # STEP 0: Print user message first (before everything)
-        print(f"  ▶ {message[-1]['role'].upper()}: {message[-1]['content']}")
+        # STEP 0: Log user message first (before everything)
+        if debug:
+            logger.debug("  ▶ %s: %s", message[-1]['role'].upper(), message[-1]['content'])
 
         # STEP 1: Run selector BEFORE chat_completion (filter functions)
 
-        # Get request info based on actual backend used by selector
-        if self._selector_backend == "llm":
-            request_url = self.llm.urls["chat"]
-            model_path = self.llm.model_path
-        elif self._selector_backend == "dllm":
-            request_url = self.dllm.urls["generate"]
-            model_path = self.dllm.model_name
-        else:
-            request_url = "Unknown"
-            model_path = "Unknown"
-
-        print(f"  ▶ Selector Request: {request_url}")
-        print(f"    • Backend Model: {model_path}")
-        print(f"    • Input: {len(function)} functions")
+        if debug:
+            request_url, model_path = self._backend_info("selector")
+            logger.debug("  ▶ Selector Request: %s", request_url)
+            logger.debug("    • Backend Model: %s", model_path)
+            logger.debug("    • Input: %d functions", len(function))
 
         selected_functions, _ = self.selector.run_selector(
             functions=function, user_message=message
         )
 
-        print(f"  ✓ Selector: {len(selected_functions)} functions selected")
-        print(f"    • Result: {selected_functions}\n")
+        if debug:
+            logger.debug("  ✓ Selector: %d functions selected", len(selected_functions))
+            logger.debug("    • Result: %s\n", selected_functions)
 
         # Filter messages using selected functions
         message = filter_message(
@@ -100,7 +123,7 @@ class SelectorMixin:
         return super()._query_prompting(inference_data)
 
 
-class EditorMixin:
+class EditorMixin(_BackendInfoMixin):
     """
     Mixin that adds format editing capability.
 
@@ -111,6 +134,8 @@ class EditorMixin:
             pass
     """
 
+    _has_editor = True
+
     def _initialize_features(self):
         """Initialize the Format_Editor component."""
         super()._initialize_features()
@@ -131,6 +156,8 @@ class EditorMixin:
         else:
             raise ValueError(f"Unknown feature backend: {self.feature_backend}")
 
+        self._cache_backend_info("editor", self._editor_backend)
+
     def _query_prompting(self, inference_data: dict):
         """
         Query backend with editor (after chat_completion).
@@ -140,26 +167,19 @@ class EditorMixin:
         2. Run editor to fix format (AFTER chat_completion)
         """
         function: list[dict] = inference_data["function"]
+        # Trace arguments (request info, reprs of large lists) are only built when enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         # STEP 1: Call parent's _query_prompting to get response
         response, latency = super()._query_prompting(inference_data)
 
         # STEP 2: Run editor AFTER chat_completion (fix format)
 
-        # Get request info based on actual backend used by editor
-        if self._editor_backend == "llm":
-            request_url = self.llm.urls["chat"]
-            model_path = self.llm.model_path
-        elif self._editor_backend == "dllm":
-            request_url = self.dllm.urls["generate"]
-            model_path = self.dllm.model_name
-        else:
-            request_url = "Unknown"
-            model_path = "Unknown"
-
-        print(f"  ▶ Editor Request: {request_url}")
-        print(f"    • Backend Model: {model_path}")
-        print(f"    • Original length: {len(response.text)}")
+        if debug:
+            request_url, model_path = self._backend_info("editor")
+            logger.debug("  ▶ Editor Request: %s", request_url)
+            logger.debug("    • Backend Model: %s", model_path)
+            logger.debug("    • Original length: %d", len(response.text))
 
         # Run editor to fix format
         original_response = response.text
@@ -169,8 +189,9 @@ class EditorMixin:
             agent_response=original_response,
         )
 
-        print(f"  ✓ Editor: Edited length: {len(edited_response)}")
-        print(f"    • Result: {edited_response}")
+        if debug:
+            logger.debug("  ✓ Editor: Edited length: %d", len(edited_response))
+            logger.debug("    • Result: %s", edited_response)
 
         # Update response with edited content
         response.text = edited_response
@@ -213,48 +234,45 @@ class SelectorEditorMixin(SelectorMixin, EditorMixin):
         else:
             raise ValueError(f"Unknown feature backend: {self.feature_backend}")
 
-        self.selector = Selector(llm=backend)
+        self.selector = Selector(llm=backend, use_cache=self.use_cache)
         self.editor = Format_Editor(llm=backend)
+        self._cache_backend_info("selector", self._selector_backend)
+        self._cache_backend_info("editor", self._editor_backend)
 
     def _query_prompting(self, inference_data: dict):
         """
         Query backend with selector (before) and editor (after).
 
         Execution order:
-        1. Print user message
+        1. Log user message
         2. Run selector to filter relevant functions (BEFORE chat_completion)
         3. Call chat_completion to get response
         4. Run editor to fix format (AFTER chat_completion)
         """
         function: list[dict] = inference_data["function"]
         message: list[dict] = inference_data["message"]
+        # Trace arguments (request info, reprs of large lists) are only built when enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-        # STEP 0: Print user message first (before everything)
-        print(f"  ▶ {message[-1]['role'].upper()}: {message[-1]['content']}")
+        # STEP 0: Log user message first (before everything)
+        if debug:
+            logger.debug("  ▶ %s: %s", message[-1]['role'].upper(), message[-1]['content'])
 
         # STEP 1: Run selector BEFORE chat_completion (filter functions)
 
-        # Get request info based on actual backend used by selector
-        if self._selector_backend == "llm":
-            request_url = self.llm.urls["chat"]
-            model_path = self.llm.model_path
-        elif self._selector_backend == "dllm":
-            request_url = self.dllm.urls["generate"]
-            model_path = self.dllm.model_name
-        else:
-            request_url = "Unknown"
-            model_path = "Unknown"
-
-        print(f"  ▶ Selector Request: {request_url}")
-        print(f"    • Backend Model: {model_path}")
-        print(f"    • Input: {len(function)} functions")
+        if debug:
+            request_url, model_path = self._backend_info("selector")
+            logger.debug("  ▶ Selector Request: %s", request_url)
+            logger.debug("    • Backend Model: %s", model_path)
+            logger.debug("    • Input: %d functions", len(function))
 
         selected_functions, _ = self.selector.run_selector(
             functions=function, user_message=message
         )
 
-        print(f"  ✓ Selector: {len(selected_functions)} functions selected")
-        print(f"    • Result: {selected_functions}\n")
+        if debug:
+            logger.debug("  ✓ Selector: %d functions selected", len(selected_functions))
+            logger.debug("    • Result: %s\n", selected_functions)
 
         # Filter messages using selected functions
         message = filter_message(
@@ -273,20 +291,11 @@ class SelectorEditorMixin(SelectorMixin, EditorMixin):
 
         # STEP 3: Run editor AFTER chat_completion (fix format)
 
-        # Get request info based on actual backend used by editor
-        if self._editor_backend == "llm":
-            request_url = self.llm.urls["chat"]
-            model_path = self.llm.model_path
-        elif self._editor_backend == "dllm":
-            request_url = self.dllm.urls["generate"]
-            model_path = self.dllm.model_name
-        else:
-            request_url = "Unknown"
-            model_path = "Unknown"
-
-        print(f"  ▶ Editor Request: {request_url}")
-        print(f"    • Backend Model: {model_path}")
-        print(f"    • Original length: {len(response.text)}")
+        if debug:
+            request_url, model_path = self._backend_info("editor")
+            logger.debug("  ▶ Editor Request: %s", request_url)
+            logger.debug("    • Backend Model: %s", model_path)
+            logger.debug("    • Original length: %d", len(response.text))
 
         # Filter functions (no selection, just filter)
         filtered_functions = filter_func(function, selected_functions)
@@ -299,8 +308,9 @@ class SelectorEditorMixin(SelectorMixin, EditorMixin):
             agent_response=original_response,
         )
 
-        print(f"  ✓ Editor: Edited length: {len(edited_response)}")
-        print(f"    • Result: {edited_response}")
+        if debug:
+            logger.debug("  ✓ Editor: Edited length: %d", len(edited_response))
+            logger.debug("    • Result: %s", edited_response)
 
         # Update response with edited content
         response.text = edited_response
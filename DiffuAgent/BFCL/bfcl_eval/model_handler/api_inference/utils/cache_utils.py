@@ -0,0 +1,51 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Requests at or below this temperature are treated as deterministic and may be cached
+CACHEABLE_TEMPERATURE = 0.01
+
+
+class LLMCache:
+    """
+    Thread-safe in-memory LRU cache.
+
+    Values are returned as stored, so callers store immutable values
+    (encoded response bodies, token counts, tuples); edits a caller makes
+    to what it got back (think stripping, format editing) then never leak
+    into the cache.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(**parts: Any) -> str:
+        """Stable digest of the request fields that determine the response."""
+        if orjson is not None:
+            blob = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)
+        else:
+            blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._store.get(key)
+            if value is not None:
+                self._store.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._store[key] = value
+            self._store.move_to_end(key)
+            if len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
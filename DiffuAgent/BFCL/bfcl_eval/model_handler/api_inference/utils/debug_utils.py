@@ -6,6 +6,28 @@ and detailed input/output during testing.
 """
 
 import os
+import sys
+import json
+
+# Read once at import; the global `debug` instance below is a no-op stand-in when this is off
+DEBUG_ENABLED = os.getenv("DEBUG_DIFFUAGENT", "0") == "1"
+
+# ANSI color codes
+COLORS = {
+    "red": "\033[91m",
+    "green": "\033[92m",
+    "yellow": "\033[93m",
+    "blue": "\033[94m",
+    "purple": "\033[95m",
+    "cyan": "\033[96m",
+    "white": "\033[97m",
+    "reset": "\033[0m",
+    "bold": "\033[1m",
+}
+
+# (prefix, suffix) wrapped around a message for each color
+_COLOR_WRAP = {name: (code, COLORS["reset"]) for name, code in COLORS.items()}
+_NO_COLOR = ("", "")
 
 
 class DebugLogger:
@@ -17,61 +39,72 @@ class DebugLogger:
     """
 
     def __init__(self):
-        self.enabled = os.getenv("DEBUG_DIFFUAGENT", "0") == "1"
+        self.enabled = DEBUG_ENABLED
         self.indent_level = 0
+        self._indent_str = ""  # "  " * indent_level, kept in sync by indent()/dedent()
         self.call_id = 0
 
+    def _format(self, message: str, color: str = None) -> str:
+        """Return message with optional color and indentation applied."""
+        prefix, suffix = _COLOR_WRAP.get(color, _NO_COLOR)
+        return f"{self._indent_str}{prefix}{message}{suffix}"
+
     def _print(self, message: str, color: str = None):
         """Print message with optional color and indentation."""
-        indent = "  " * self.indent_level
-
-        # ANSI color codes
-        colors = {
-            "red": "\033[91m",
-            "green": "\033[92m",
-            "yellow": "\033[93m",
-            "blue": "\033[94m",
-            "purple": "\033[95m",
-            "cyan": "\033[96m",
-            "white": "\033[97m",
-            "reset": "\033[0m",
-            "bold": "\033[1m",
-        }
-
-        colored_message = message
-        if color and color in colors:
-            colored_message = f"{colors[color]}{message}{colors['reset']}"
-
-        print(f"{indent}{colored_message}")
+        # Hand the pieces to stdout as-is rather than building the composite line first
+        prefix, suffix = _COLOR_WRAP.get(color, _NO_COLOR)
+        sys.stdout.writelines((self._indent_str, prefix, message, suffix, "\n"))
+        sys.stdout.flush()
+
+    def _write(self, lines: list):
+        """Emit formatted lines with a single write and flush."""
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
     def section(self, title: str):
         """Print a section header."""
-        self._print(f"\n{'─'*80}", "cyan")
-        self._print(f"  {title}", "bold")
-        self._print(f"{'─'*80}\n", "cyan")
+        if not self.enabled:
+            return
+        self._write([
+            self._format(f"\n{'─'*80}", "cyan"),
+            self._format(f"  {title}", "bold"),
+            self._format(f"{'─'*80}\n", "cyan"),
+        ])
 
     def step(self, message: str):
         """Print a step message."""
+        if not self.enabled:
+            return
         self._print(f"▶ {message}", "blue")
 
     def info(self, message: str):
         """Print an info message."""
+        if not self.enabled:
+            return
         self._print(f"ℹ {message}", "white")
 
     def success(self, message: str):
         """Print a success message."""
+        if not self.enabled:
+            return
         self._print(f"✓ {message}", "green")
 
     def warning(self, message: str):
         """Print a warning message."""
+        if not self.enabled:
+            return
         self._print(f"⚠ {message}", "yellow")
 
     def error(self, message: str):
         """Print an error message."""
+        if not self.enabled:
+            return
         self._print(f"✗ {message}", "red")
 
     def data(self, key: str, value: any, truncate: int = 200):
         """Print a key-value pair."""
+        if not self.enabled:
+            return
         value_str = str(value)
 
         # Truncate long values
@@ -82,16 +115,18 @@ class DebugLogger:
 
     def json_data(self, key: str, value: dict or list, indent: int = 2):
         """Print JSON data with proper formatting."""
+        if not self.enabled:
+            return
         value_str = json.dumps(value, indent=indent, ensure_ascii=False)
 
         # Check if too long
         if len(value_str) > 500:
             lines = value_str.split("\n")
             if len(lines) > 20:
-                self._print(f"  • {key}:", "white")
-                for line in lines[:20]:
-                    self._print(f"    {line}")
-                self._print(f"    ... ({len(lines) - 20} more lines)", "yellow")
+                out = [self._format(f"  • {key}:", "white")]
+                out.extend(self._format(f"    {line}") for line in lines[:20])
+                out.append(self._format(f"    ... ({len(lines) - 20} more lines)", "yellow"))
+                self._write(out)
             else:
                 self._print(f"  • {key}:\n{value_str}", "white")
         else:
@@ -100,13 +135,17 @@ class DebugLogger:
     def indent(self):
         """Increase indentation."""
         self.indent_level += 1
+        self._indent_str = "  " * self.indent_level
 
     def dedent(self):
         """Decrease indentation."""
         self.indent_level = max(0, self.indent_level - 1)
+        self._indent_str = "  " * self.indent_level
 
     def call_start(self, component: str, method: str, call_id: int = None):
         """Mark the start of a method call."""
+        if not self.enabled:
+            return self.call_id if call_id is None else call_id
         if call_id is None:
             self.call_id += 1
             call_id = self.call_id
@@ -117,6 +156,8 @@ class DebugLogger:
 
     def call_end(self, component: str, method: str, result: str = None):
         """Mark the end of a method call."""
+        if not self.enabled:
+            return
         self.dedent()
         if result:
             self._print(f"[{self.call_id}] ← {component}.{method}() → {result}", "purple")
@@ -125,8 +166,27 @@ class DebugLogger:
 
     def separator(self):
         """Print a separator."""
+        if not self.enabled:
+            return
         self._print("", "white")
 
 
+class _NullLogger:
+    """DebugLogger stand-in used when debugging is disabled; every method is a no-op."""
+
+    enabled = False
+    indent_level = 0
+    call_id = 0
+
+    def _noop(self, *args, **kwargs):
+        pass
+
+    section = step = info = success = warning = error = _noop
+    data = json_data = indent = dedent = call_end = separator = _noop
+
+    def call_start(self, component: str, method: str, call_id: int = None):
+        return self.call_id if call_id is None else call_id
+
+
 # Global debug logger instance
-debug = DebugLogger()
+debug = DebugLogger() if DEBUG_ENABLED else _NullLogger()
@@ -1,24 +1,8 @@
+import json
 from typing import Any, Dict, List, Tuple
 import time
 
-class Format_Editor():
-
-    def __init__(self, llm):
-        self.llm = llm
-
-    def user_message_to_history(self, message):
-        history = []
-        for m in message:
-            if m["role"] == "system":
-                continue
-            history.append(f"{m['role'].upper()}: {m['content']}")
-            
-        return "\n".join(history)
-
-    def build_editor_prompt(self, message: list[dict[str, str]], response: str) -> str:
-        history = self.user_message_to_history(message)
-        
-        system_prompt = """\
+SYSTEM_PROMPT_EDITOR = """\
 You are a strict tool-call format auditor and repairer.
 
 Your task:
@@ -59,8 +43,8 @@ The task is now complete. The final tool-call is {"ls": {}}
 Output 4:
 [ls()]
 """
-        
-        user_prompt = """\
+
+USER_PROMPT_EDITOR = """\
 BROKEN_TOOL_CALL (to be audited and possibly corrected):
 {response}
 
@@ -69,24 +53,7 @@ Now produce the final output according to the rules above. No explanations, mark
 Output:
 """
 
-        message = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt.format(response=response)}
-        ]
-
-        return message
-
-
-    def build_regenerate_tool_call_prompt(
-            self,
-            message: list[dict[str, str]],
-            functions: list[dict],
-        ) -> List[Dict[str, Any]]:
-
-        history = self.user_message_to_history(message)
-        functions_str = str(functions)
-    
-        system_prompt = """\
+SYSTEM_PROMPT_REGEN = """\
 You are a strict tool-call generator for a fixed tool-call grammar.
 
 Context:
@@ -105,7 +72,7 @@ Hard rules:
    NO_VALID_TOOL_CALLS!
 """
 
-        user_prompt = """\
+USER_PROMPT_REGEN = """\
 INTERACTION HISTORY:
 {interaction_history}
 
@@ -118,40 +85,102 @@ AVAILABLE_TOOLS:
 Now generate a NEW valid tool-call that best fulfills the user requirement, strictly following TOOL_CALL_FORMAT.
 """
 
+# Allowance for chat-template tokens (role markers, generation prompt) in _fits_by_size
+TEMPLATE_TOKEN_MARGIN = 64
+
+
+class Format_Editor():
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def user_message_to_history(self, message):
+        history = []
+        for m in message:
+            if m["role"] == "system":
+                continue
+            history.append(f"{m['role'].upper()}: {m['content']}")
+            
+        return "\n".join(history)
+
+    def build_editor_prompt(self, message: list[dict[str, str]], response: str) -> str:
+        message = [
+            {"role": "system", "content": SYSTEM_PROMPT_EDITOR},
+            {"role": "user", "content": USER_PROMPT_EDITOR.format(response=response)}
+        ]
+
+        return message
+
+
+    def build_regenerate_tool_call_prompt(
+            self,
+            message: list[dict[str, str]],
+            functions: list[dict],
+        ) -> List[Dict[str, Any]]:
+
+        history = self.user_message_to_history(message)
+        functions_str = json.dumps(functions, ensure_ascii=False)
+
         return [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt.format(
+            {"role": "system", "content": SYSTEM_PROMPT_REGEN},
+            {"role": "user", "content": USER_PROMPT_REGEN.format(
                 interaction_history=history,
                 functions_str=functions_str
             )}
         ]
 
+    def _fits_by_size(self, message: List[Dict[str, str]]) -> bool:
+        """
+        Cheap upper bound on the prompt length: every token covers at least one UTF-8 byte,
+        plus TEMPLATE_TOKEN_MARGIN for the chat template around the messages.
+        """
+        num_bytes = sum(len(m["content"].encode("utf-8")) for m in message)
+        return num_bytes + TEMPLATE_TOKEN_MARGIN <= self.llm.context_length
+
     def run_formateditor(self,
                          messages: List[Dict[str, str]],
                          functions: List[Dict],
                          agent_response: str,
                          ):
 
-        # editor_message = self.build_editor_prompt(message=messages, response=agent_response)
-
-        while True:
-            editor_message = self.build_editor_prompt(
-                message=messages,
-                response=agent_response
-            )
-
-            token_len = self.llm.num_tokens_from_messages(editor_message, quiet=True)
-
-            # New stop condition: only one line left (or empty)
-            if agent_response.count("\n") == 0:
-                if len(agent_response) > 10000:  # Only keep the first 10000 characters
-                    agent_response = agent_response[:10000]
-                break
-
-            if token_len > self.llm.context_length:
-                agent_response = "\n".join(agent_response.splitlines()[:-1])
-            else:
-                break  # Stop once valid
+        editor_message = self.build_editor_prompt(message=messages, response=agent_response)
+
+        # Fast path: a single line is never trimmed, and a prompt whose UTF-8 size fits
+        # cannot exceed the context, so only longer multi-line responses are tokenized
+        if (
+            "\n" in agent_response
+            and not self._fits_by_size(editor_message)
+            and self.llm.num_tokens_from_messages(editor_message, quiet=True) > self.llm.context_length
+        ):
+            # Keep the longest line prefix that fits; binary search over the newline offsets
+            # needs log2(n) tokenizations instead of one per dropped line, and each candidate
+            # is a single slice rather than a split and rejoin.
+            cuts = []
+            idx = agent_response.find("\n")
+            while idx != -1:
+                cuts.append(idx)
+                idx = agent_response.find("\n", idx + 1)
+
+            # The probes below only swap the user turn's content of the message built above
+            user_turn = editor_message[1]
+            lo, hi = 0, len(cuts) - 1
+            best_cut = 0
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                user_turn["content"] = USER_PROMPT_EDITOR.format(response=agent_response[:cuts[mid]])
+                if self.llm.num_tokens_from_messages(editor_message, quiet=True) > self.llm.context_length:
+                    hi = mid - 1
+                else:
+                    best_cut = mid
+                    lo = mid + 1
+
+            agent_response = agent_response[:cuts[best_cut]]
+            user_turn["content"] = USER_PROMPT_EDITOR.format(response=agent_response)
+
+        # Only one line left (or empty)
+        if "\n" not in agent_response:
+            if len(agent_response) > 10000:  # Only keep the first 10000 characters
+                agent_response = agent_response[:10000]
 
         response = self.llm.chat_completion(editor_message, max_tokens=64, quiet=True)
 
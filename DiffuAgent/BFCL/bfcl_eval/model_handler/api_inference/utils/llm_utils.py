@@ -2,6 +2,9 @@ import os
 from transformers import AutoConfig, AutoTokenizer
 from typing import Any, Dict, List
 
+# (model_path_or_id, tokenizer, max_context_length) per resolve_model_and_context_length arguments
+_RESOLVE_CACHE: Dict[tuple, tuple] = {}
+
 def normalize_tools_schema(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Convert "simple tools schema" -> "OpenAI-like tools schema".
@@ -134,7 +137,14 @@ def resolve_model_and_context_length(
     model_path_or_id : str
     tokenizer        : AutoTokenizer | None
     max_context_len  : int
+
+    Results are cached per argument tuple for the process lifetime, so the
+    tokenizer/config are only loaded once per model.
     """
+    cache_key = (local_model_path, model_name_huggingface, default_context_length, trust_remote_code)
+    cached = _RESOLVE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     # -------- 1. Resolve model source --------
     if local_model_path is not None:
@@ -194,7 +204,9 @@ def resolve_model_and_context_length(
     except Exception:
         pass  # Allow failure, continue
 
-    return model_path_or_id, tokenizer, max_context_length
+    result = (model_path_or_id, tokenizer, max_context_length)
+    _RESOLVE_CACHE[cache_key] = result
+    return result
 
 import json
 import re
@@ -202,33 +214,96 @@ from typing import Any, Dict, List, Tuple
 
 # toolcall transfer
 
-_TOOL_CALL_RE = re.compile(
-    r"""
-    (?P<name>[A-Za-z_][A-Za-z0-9_]*)      # function name
-    \s*\(\s*
-    (?P<args>\{.*?\})                    # JSON object args
-    \s*\)
-    """,
-    re.VERBOSE | re.DOTALL,
-)
+# Matches the "name(" prefix of a tool call; the JSON args are then brace-balanced
+# by _scan_json_object, which also handles nested objects the old lazy regex cut short
+_TOOL_CALL_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)\s*\(\s*")
+
+def _scan_json_object(s: str, start: int) -> int:
+    """
+    Return the index just past the JSON object starting at s[start] ("{"),
+    or -1 if it is unterminated. Braces inside string literals are ignored.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(s)):
+        c = s[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+def _iter_tool_calls(s: str):
+    """Yield (name, args_json) for every `name({...})` call in s, in a single pass."""
+    pos = 0
+    while True:
+        m = _TOOL_CALL_RE.search(s, pos)
+        if m is None:
+            return
+        start = m.end()
+        if start >= len(s) or s[start] != "{":
+            pos = m.end()
+            continue
+        end = _scan_json_object(s, start)
+        if end < 0:
+            # Unterminated arguments (e.g. a truncated call); later calls may still be complete
+            pos = m.end()
+            continue
+        close = end
+        while close < len(s) and s[close].isspace():
+            close += 1
+        if close >= len(s) or s[close] != ")":
+            pos = m.end()
+            continue
+        yield m.group(1), s[start:end]
+        pos = close + 1
+
+def _py_literal_list(v: list) -> str:
+    return "[" + ", ".join(_py_literal(x) for x in v) + "]"
+
+def _py_literal_dict(v: dict) -> str:
+    # dict literal with JSON-style keys
+    return "{" + ", ".join(f"{json.dumps(k, ensure_ascii=False)}: {_py_literal(val)}" for k, val in v.items()) + "}"
+
+# Exact-type formatters; bool must not fall through to int
+_LITERAL_DISPATCH = {
+    str: lambda v: json.dumps(v, ensure_ascii=False),  # valid escaping with double quotes
+    int: str,
+    float: str,
+    bool: lambda v: "True" if v else "False",
+    type(None): lambda v: "None",
+    list: _py_literal_list,
+    dict: _py_literal_dict,
+}
 
 def _py_literal(v: Any) -> str:
     """Convert JSON value to a Python-literal string."""
-    if v is None:
-        return "None"
+    fmt = _LITERAL_DISPATCH.get(type(v))
+    if fmt is not None:
+        return fmt(v)
+    # subclasses of the JSON types
     if isinstance(v, bool):
         return "True" if v else "False"
     if isinstance(v, (int, float)):
         return str(v)
     if isinstance(v, str):
-        # json.dumps gives valid escaping with double quotes
         return json.dumps(v, ensure_ascii=False)
     if isinstance(v, list):
-        return "[" + ", ".join(_py_literal(x) for x in v) + "]"
+        return _py_literal_list(v)
     if isinstance(v, dict):
-        # dict literal with JSON-style keys
-        items = ", ".join(f"{json.dumps(k, ensure_ascii=False)}: {_py_literal(val)}" for k, val in v.items())
-        return "{" + items + "}"
+        return _py_literal_dict(v)
     # fallback
     return json.dumps(str(v), ensure_ascii=False)
 
@@ -247,15 +322,13 @@ def ministral_toolcalls_to_bfcl(text: str) -> str:
     if s.startswith("[TOOL_CALLS]"):
         s = s[len("[TOOL_CALLS]"):].strip()
 
-    matches = list(_TOOL_CALL_RE.finditer(s))
+    matches = list(_iter_tool_calls(s))
     if not matches:
         # If no tool calls detected, return original or empty list depending on your eval needs
         return "[]"
 
     calls: List[str] = []
-    for m in matches:
-        name = m.group("name")
-        args_json = m.group("args")
+    for name, args_json in matches:
         try:
             args: Dict[str, Any] = json.loads(args_json)
         except json.JSONDecodeError:
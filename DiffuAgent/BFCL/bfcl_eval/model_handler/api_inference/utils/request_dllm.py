@@ -2,14 +2,18 @@ import os
 import time
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from types import SimpleNamespace
-import sys
-import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+try:
+    import orjson
+except ImportError:
+    orjson = None
 try:
     from bfcl_eval.model_handler.api_inference.utils.debug_utils import debug
 except ImportError:
     debug = None
+from bfcl_eval.model_handler.api_inference.utils.cache_utils import LLMCache, CACHEABLE_TEMPERATURE
 
 DLLM_TEMPLATE = {
     "Llada": {
@@ -44,6 +48,8 @@ DLLM_TEMPLATE = {
     },
 }
 
+_VALID_MODELS = frozenset(DLLM_TEMPLATE)
+
 # Default configuration (can be overridden by parameters or environment variables)
 # Set via environment variables: DLLM_API_KEY, DLLM_BASE_URL or FEATURES_API_KEY, FEATURES_BASE_URL
 API_KEY_DICT = {
@@ -51,18 +57,78 @@ API_KEY_DICT = {
     "base_url": os.getenv("DLLM_BASE_URL") or os.getenv("FEATURES_BASE_URL") or "",
 }
 
+# Maximum number of cached token counts per REQUEST_DLLM instance
+TOKEN_CACHE_SIZE = 4096
+
+# Shared across REQUEST_DLLM instances so selector, main and editor calls reuse keep-alive connections.
+# The pool is sized for concurrent test cases. Only failures where the server never processed the
+# request are retried with backoff: connection errors and 429/503 rejections. Read timeouts and other
+# 5xx responses are not, so a stalled generation fails after one read timeout and is never sent twice.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=False,
+        other=0,
+        backoff_factor=0.2,
+        status_forcelist=[429, 503],
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Responses to (near-)greedy requests, shared across REQUEST_DLLM instances that opt in with use_cache.
+# Entries are the encoded JSON bodies, so every hit decodes a fresh object that callers may mutate.
+_RESPONSE_CACHE = LLMCache()
+
+# Request/response bodies can carry many KB of function schemas; prefer orjson when installed
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    _json_loads = json.loads
+
+def _to_ns(obj):
+    """Recursively convert decoded JSON (dicts/lists) into SimpleNamespace objects."""
+    if isinstance(obj, dict):
+        return SimpleNamespace(**{k: _to_ns(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return [_to_ns(x) for x in obj]
+    return obj
+
 class REQUEST_DLLM:
     def __init__(self,
                  model_name: str,
                  base_url: str="",
                  api_key: str="",
+                 tokenizer=None,
+                 use_cache: bool = False,
                  ):
 
        
         self.model_name = model_name
-        assert model_name in ["Llada", "Dream", "Fdllmv2", "Wedlm", "Dllmvar"]
+        if model_name not in _VALID_MODELS:
+            raise ValueError(
+                f"Unknown DLLM model '{model_name}', expected one of {sorted(_VALID_MODELS)}"
+            )
 
-        self.context_length = DLLM_TEMPLATE[self.model_name]["context_length"]
+        self._tpl = DLLM_TEMPLATE[self.model_name]
+        self.context_length = self._tpl["context_length"]
+
+        # Per-model decoding settings, identical for every generate request
+        self._payload_template = {
+            "dual_cache": self._tpl["dual_cache"],
+            "block_size": self._tpl["block_size"],
+            "threshold": self._tpl["threshold"],
+            "return_tokens": True,
+        }
 
         self.base_url = base_url if base_url != "" else API_KEY_DICT["base_url"]
         self.api_key = api_key if api_key != "" else API_KEY_DICT["api_key"]
@@ -78,12 +144,21 @@ class REQUEST_DLLM:
             "tokenize": f"{self.base_url}/tokens",
         }
 
+        # Optional local tokenizer of the DLLM; counts tokens without a /tokens round trip
+        self.tokenizer = tokenizer
+
+        # Opt-in: serve repeated deterministic requests within this process from _RESPONSE_CACHE
+        self.use_cache = use_cache
+
+        # Token counts keyed by a digest of (model_name, messages)
+        self._tok_cache = LLMCache(maxsize=TOKEN_CACHE_SIZE)
+
     def check_server_availability(self, ) -> None:
         """Check server is ready or not."""
 
         try:
             # Make a simple request to check if the server is up
-            response = requests.get(self.urls["model"], headers=self.headers)
+            response = _SESSION.get(self.urls["model"], headers=self.headers)
             if response.status_code == 200:
                 server_ready = True
                 print("server is ready!")
@@ -99,17 +174,24 @@ class REQUEST_DLLM:
         max_tokens: int = 256,
         steps: int = -1,
         quiet: bool = False,
+        input_tokens: int | None = None,
     ):
-        """Chat completion with OpenAI-style messages."""
+        """
+        Chat completion with OpenAI-style messages.
+
+        Callers that already counted the prompt tokens pass them as
+        input_tokens to skip the tokenize round trip.
+        """
 
         if not isinstance(messages, list):
             raise TypeError("messages must be a list of dicts")
 
         # Get input token count to safely limit max_tokens
-        try:
-            input_tokens = self.num_tokens_from_messages(messages, quiet=True)
-        except:
-            input_tokens = 0
+        if input_tokens is None:
+            try:
+                input_tokens = self.num_tokens_from_messages(messages, quiet=True)
+            except:
+                input_tokens = 0
 
         # Limit max_tokens for DLLM to prevent OOM:
         # 1. Maximum 256 tokens
@@ -126,10 +208,7 @@ class REQUEST_DLLM:
             "gen_length": safe_max_tokens,
             "temperature": temperature,
             "steps": steps if steps > 0 else safe_max_tokens,
-            "dual_cache": DLLM_TEMPLATE[self.model_name]["dual_cache"],
-            "block_size": DLLM_TEMPLATE[self.model_name]["block_size"],
-            "threshold": DLLM_TEMPLATE[self.model_name]["threshold"],
-            "return_tokens": True
+            **self._payload_template,
         }
 
         # DEBUG: Log request with nice format
@@ -139,24 +218,39 @@ class REQUEST_DLLM:
             print(f"    • Temperature: {temperature}")
             print(f"    • Max tokens: {max_tokens}")
 
-        start_time = time.time()
-        response = requests.post(
-            url=self.urls["generate"],
-            headers=self.headers,
-            json=payload,          # ✅ JSON body
-            timeout=60,
-        )
-        end_time = time.time()
+        # With use_cache, deterministic requests are answered from the cache when seen before
+        cache_key = None
+        cached = None
+        if self.use_cache and temperature <= CACHEABLE_TEMPERATURE:
+            cache_key = LLMCache.cache_key(url=self.urls["generate"], payload=payload)
+            cached = _RESPONSE_CACHE.get(cache_key)
 
-        response.raise_for_status()
+        if cached is not None:
+            api_response = _json_loads(cached)
+            latency = 0.0
+            if not quiet:
+                print("  ✓ DLLM Response served from cache")
+        else:
+            start_time = time.time()
+            response = _SESSION.post(
+                url=self.urls["generate"],
+                headers=self.headers,
+                data=_json_dumps(payload),          # ✅ JSON body
+                timeout=60,
+            )
+            end_time = time.time()
+            latency = end_time - start_time
 
-        # DEBUG: Log response with nice format
-        if not quiet:
-            print(f"  ✓ DLLM Response received in {end_time-start_time:.2f}s")
-            print(f"    • Status code: {response.status_code}")
+            response.raise_for_status()
+
+            # DEBUG: Log response with nice format
+            if not quiet:
+                print(f"  ✓ DLLM Response received in {latency:.2f}s")
+                print(f"    • Status code: {response.status_code}")
+
+            api_response = _json_loads(response.content)
 
-        api_response = response.json()
-        api_response_object = json.loads(json.dumps(api_response), object_hook=lambda d: SimpleNamespace(**d))
+        api_response_object = _to_ns(api_response)
 
         try:
             text = api_response_object.response
@@ -167,6 +261,9 @@ class REQUEST_DLLM:
 
         completion_tokens = api_response_object.token
 
+        if cache_key is not None and cached is None:
+            _RESPONSE_CACHE.put(cache_key, _json_dumps(api_response))
+
         # if self.model_name == "WeDLM":
         #     time.sleep(1)  # prevent WeDLM from crashing
 
@@ -174,7 +271,7 @@ class REQUEST_DLLM:
             object=api_response_object,
             json=api_response,
             text=text,
-            latency=end_time-start_time,
+            latency=latency,
             num_token=completion_tokens,
         )
         
@@ -184,24 +281,41 @@ class REQUEST_DLLM:
         if not isinstance(messages, list):
             raise TypeError("messages must be a list of dicts")
 
+        if self.tokenizer is not None:
+            try:
+                return len(self.tokenizer.apply_chat_template(
+                    messages, tokenize=True, add_generation_prompt=True
+                ))
+            except Exception:
+                pass  # e.g. roles the chat template rejects; ask the server instead
+
+        # The handler and chat_completion both count the same messages, and the
+        # selector/editor resend near-identical prompts
+        key = LLMCache.cache_key(model=self.model_name, messages=messages)
+        cached = self._tok_cache.get(key)
+        if cached is not None:
+            return cached
+
         payload = {
             "model": self.model_name,
             "messages": messages,
         }
 
-        response = requests.post(
+        response = _SESSION.post(
             url=self.urls["tokenize"],  # Note: key is "tokenize" but value is "/tokens"
             headers=self.headers,
-            json=payload,
+            data=_json_dumps(payload),
             timeout=60,
         )
 
         response.raise_for_status()
-        response_dict = response.json()
+        response_dict = _json_loads(response.content)
 
         if "num_of_tokens" not in response_dict:
             raise ValueError(
                 f"Tokenize API returned unexpected response: {response_dict}"
             )
 
-        return int(response_dict["num_of_tokens"])
\ No newline at end of file
+        num_tokens = int(response_dict["num_of_tokens"])
+        self._tok_cache.put(key, num_tokens)
+        return num_tokens
\ No newline at end of file
@@ -1,16 +1,72 @@
-import os
 import time
 import json
-import sys
-import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 try:
     from bfcl_eval.model_handler.api_inference.utils.debug_utils import debug
 except ImportError:
     debug = None
+from bfcl_eval.model_handler.api_inference.utils.cache_utils import LLMCache, CACHEABLE_TEMPERATURE
 
-from types import SimpleNamespace
+from dataclasses import dataclass
+from typing import Any
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Chat responses and tool schemas can be many KB; prefer orjson when installed
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of cached token counts per REQUEST_LLM instance
+TOKEN_CACHE_SIZE = 4096
+
+# Shared across REQUEST_LLM instances so the main model, selector and editor reuse keep-alive connections.
+# The pool is sized for concurrent test cases. Only failures where the server never processed the
+# request are retried with backoff: connection errors and 429/503 rejections. Read timeouts and other
+# 5xx responses are not, so a stalled generation fails after one read timeout and is never sent twice.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=False,
+        other=0,
+        backoff_factor=0.2,
+        status_forcelist=[429, 503],
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Model endpoints that already answered check_server_availability
+_READY_SERVERS = set()
+
+# Responses to (near-)greedy requests, shared across REQUEST_LLM instances that opt in with use_cache.
+# Entries are the encoded JSON bodies, so every hit decodes a fresh object that callers may mutate.
+_RESPONSE_CACHE = LLMCache()
+
+@dataclass(slots=True)
+class LLMResponse:
+    """Result of a REQUEST_LLM completion call; json is the decoded response body."""
+    json: dict[str, Any]
+    text: str
+    latency: float
+    num_token: int
 
 class REQUEST_LLM:
     def __init__(self,
@@ -18,10 +74,18 @@ class REQUEST_LLM:
                  base_url: str="",
                  api_key: str="",
                  context_length="4096",
+                 use_cache: bool = False,
+                 tokenizer=None,
+                 connect_timeout: float = 10,
+                 read_timeout: float = 600,
                  ):
 
         self.context_length = context_length
         self.model_path = model_path
+
+        # (connect, read) timeouts: a dead server fails fast instead of pinning a worker;
+        # the read timeout bounds the gap between received bytes, not the whole generation
+        self.timeout = (connect_timeout, read_timeout)
         self.base_url = base_url
         self.headers = {
             "Content-Type": "application/json",
@@ -35,19 +99,149 @@ class REQUEST_LLM:
             "completion": f"{self.base_url}/v1/completions",
         }
 
-    def check_server_availability(self, ) -> None:
-        """Check server is ready or not."""
+        # Prepared POST requests (URL, headers, auth) and their send settings, keyed by URL;
+        # built on first use and copied per call by _send
+        self._prepared = {}
+
+        # Fields shared by every request body
+        self._payload_base = {"model": self.model_path}
+
+        # Opt-in: serve repeated deterministic requests within this process from _RESPONSE_CACHE
+        self.use_cache = use_cache
+
+        # Optional local tokenizer of the served model; counts tokens without a /tokenize round trip
+        self.tokenizer = tokenizer
+
+        # Token counts keyed by a digest of the tokenize payload; the same system
+        # prompt and tool list are counted on every turn
+        self._tok_cache = LLMCache(maxsize=TOKEN_CACHE_SIZE)
+
+    def check_server_availability(self, ) -> bool:
+        """
+        Check server is ready or not.
+
+        A server that answered once is not probed again, so handlers sharing
+        a base_url cost a single round trip. Raises ConnectionError if the
+        server cannot be reached.
+        """
+
+        if self.urls["model"] in _READY_SERVERS:
+            return True
 
         try:
             # Make a simple request to check if the server is up
-            response = requests.get(self.urls["model"], headers=self.headers)
-            if response.status_code == 200:
-                server_ready = True
-                print("server is ready!")
-        except:
-            raise requests.exceptions.ConnectionError
-        
-        return 
+            response = _SESSION.get(self.urls["model"], headers=self.headers, timeout=(self.timeout[0], 5))
+        except requests.exceptions.RequestException as e:
+            raise requests.exceptions.ConnectionError(
+                f"LLM server at {self.base_url} is not reachable"
+            ) from e
+
+        if response.status_code != 200:
+            return False
+
+        _READY_SERVERS.add(self.urls["model"])
+        logger.info("server is ready!")
+        return True
+
+    def _send(self, url: str, payload: dict, stream: bool = False) -> requests.Response:
+        """
+        POST payload as JSON to url.
+
+        The URL and headers are prepared once per endpoint; each call only
+        copies the prepared request and attaches a new body, so concurrent
+        callers never share a mutable request.
+        """
+        entry = self._prepared.get(url)
+        if entry is None:
+            template = _SESSION.prepare_request(
+                requests.Request(method="POST", url=url, headers=self.headers)
+            )
+            settings = _SESSION.merge_environment_settings(template.url, {}, None, None, None)
+            settings.pop("stream", None)
+            entry = self._prepared[url] = (template, settings)
+
+        template, settings = entry
+        prepared = template.copy()
+        prepared.prepare_body(data=_json_dumps(payload), files=None)
+        return _SESSION.send(prepared, timeout=self.timeout, stream=stream, **settings)
+
+    def _post_cached(self, url: str, payload: dict, temperature: float, stream: bool = False):
+        """
+        POST payload to url and decode the JSON body.
+
+        With use_cache, deterministic requests are looked up in the response cache first.
+        With stream=True the chat response is consumed as server-sent events
+        and reassembled into the non-streaming format (see _post_stream).
+        Returns (api_response, latency, status_code, cache_key): status_code
+        is None on a cache hit, and cache_key is set when the caller should
+        store the response once it has been validated.
+        """
+        cache_key = None
+        if self.use_cache and temperature <= CACHEABLE_TEMPERATURE:
+            cache_key = LLMCache.cache_key(url=url, payload=payload)
+            cached = _RESPONSE_CACHE.get(cache_key)
+            if cached is not None:
+                return _json_loads(cached), 0.0, None, cache_key
+
+        start_ns = time.perf_counter_ns()
+        if stream:
+            api_response, status_code = self._post_stream(url, payload)
+            latency = (time.perf_counter_ns() - start_ns) / 1e9
+            return api_response, latency, status_code, cache_key
+
+        response = self._send(url, payload)
+        latency = (time.perf_counter_ns() - start_ns) / 1e9
+
+        response.raise_for_status()
+        return _json_loads(response.content), latency, response.status_code, cache_key
+
+    def _post_stream(self, url: str, payload: dict):
+        """
+        POST a streaming chat request and accumulate the delta chunks.
+
+        Returns (api_response, status_code) where api_response has the same
+        shape as a non-streaming chat completion, so callers and the response
+        cache need not distinguish the two.
+        """
+        body = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+
+        content_parts = []
+        finish_reason = None
+        usage = None
+        num_chunks = 0
+        with self._send(url, body, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[6:]
+                if data == b"[DONE]":
+                    break
+                chunk = _json_loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                for choice in chunk.get("choices") or ():
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        content_parts.append(content)
+                        num_chunks += 1
+                    if choice.get("finish_reason") is not None:
+                        finish_reason = choice["finish_reason"]
+            status_code = response.status_code
+
+        if usage is None:
+            # Server ignored include_usage; vLLM emits one content chunk per token
+            usage = {"prompt_tokens": 0, "completion_tokens": num_chunks}
+
+        api_response = {
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(content_parts)},
+                "finish_reason": finish_reason,
+            }],
+            "usage": usage,
+        }
+        return api_response, status_code
 
     def completion(
         self,
@@ -56,39 +250,32 @@ class REQUEST_LLM:
         max_tokens: int = 256,
     ):
         payload = {
-            "model": self.model_path,
+            **self._payload_base,
             "prompt": prompt,
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
 
-        start_time = time.time()
-        response = requests.post(
-            url=self.urls["completion"],
-            headers=self.headers,
-            json=payload,
-            timeout=72000,
+        api_response, latency, _, cache_key = self._post_cached(
+            self.urls["completion"], payload, temperature
         )
-        end_time = time.time()
-
-        response.raise_for_status()
-        api_response = response.json()
-        api_response_object = json.loads(json.dumps(api_response), object_hook=lambda d: SimpleNamespace(**d))
 
         try:
-            text = api_response_object.choices[0].text
-        except (KeyError, IndexError) as e:
+            text = api_response["choices"][0]["text"]
+        except (KeyError, IndexError, TypeError) as e:
             raise ValueError(
-                f"Unexpected completion response format: {api_response_object}"
+                f"Unexpected completion response format: {api_response}"
             ) from e
 
-        completion_tokens = api_response_object.usage.completion_tokens
+        completion_tokens = api_response["usage"]["completion_tokens"]
+
+        if cache_key is not None:
+            _RESPONSE_CACHE.put(cache_key, _json_dumps(api_response))
 
-        return SimpleNamespace(
-            object=api_response_object,
+        return LLMResponse(
             json=api_response,
             text=text,
-            latency=end_time-start_time,
+            latency=latency,
             num_token=completion_tokens,
         )
 
@@ -98,62 +285,65 @@ class REQUEST_LLM:
         temperature: float = 0.1,
         max_tokens: int = 256,
         quiet: bool = False,
+        stream: bool = False,
     ):
-        """Chat completion with OpenAI-style messages."""
+        """
+        Chat completion with OpenAI-style messages.
+
+        With stream=True the response is read incrementally as the server
+        generates it instead of waiting for one large body; the returned
+        object is the same.
+        """
 
         if not isinstance(messages, list):
             raise TypeError("messages must be a list of dicts")
 
         payload = {
-            "model": self.model_path,
+            **self._payload_base,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
 
         # DEBUG: Log request with nice format
-        if not quiet:
-            print(f"  ▶ LLM Request: {self.urls['chat']}")
-            print(f"    • Model: {self.model_path}")
-            print(f"    • Temperature: {temperature}")
-            print(f"    • Max tokens: {max_tokens}")
-
-        start_time = time.time()
-        response = requests.post(
-            url=self.urls["chat"],
-            headers=self.headers,
-            json=payload,
-            timeout=72000,
+        debug = not quiet and logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("  ▶ LLM Request: %s", self.urls['chat'])
+            logger.debug("    • Model: %s", self.model_path)
+            logger.debug("    • Temperature: %s", temperature)
+            logger.debug("    • Max tokens: %s", max_tokens)
+
+        api_response, latency, status_code, cache_key = self._post_cached(
+            self.urls["chat"], payload, temperature, stream=stream
         )
-        end_time = time.time()
-
-        response.raise_for_status()
-
-        api_response = response.json()
-        api_response_object = json.loads(json.dumps(api_response), object_hook=lambda d: SimpleNamespace(**d))
 
         try:
-            text = api_response_object.choices[0].message.content
-        except (KeyError, IndexError) as e:
+            text = api_response["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
             raise ValueError(
-                f"Unexpected chat completion response format: {api_response_object}"
+                f"Unexpected chat completion response format: {api_response}"
             ) from e
 
-        completion_tokens = api_response_object.usage.completion_tokens
-        input_tokens = api_response_object.usage.prompt_tokens
+        completion_tokens = api_response["usage"]["completion_tokens"]
+        input_tokens = api_response["usage"]["prompt_tokens"]
 
-        # DEBUG: Log response with nice format
-        if not quiet:
-            print(f"  ✓ LLM Response received in {end_time-start_time:.2f}s")
-            print(f"    • Status code: {response.status_code}")
-            print(f"    • Input tokens: {input_tokens}")
-            print(f"    • Output tokens: {completion_tokens}")
+        if cache_key is not None:
+            _RESPONSE_CACHE.put(cache_key, _json_dumps(api_response))
 
-        return SimpleNamespace(
-            object=api_response_object,
+        # DEBUG: Log response with nice format
+        if debug:
+            if status_code is None:
+                logger.debug("  ✓ LLM Response served from cache")
+            else:
+                logger.debug("  ✓ LLM Response received in %.2fs", latency)
+                logger.debug("    • Status code: %s", status_code)
+            logger.debug("    • Input tokens: %s", input_tokens)
+            logger.debug("    • Output tokens: %s", completion_tokens)
+
+        return LLMResponse(
             json=api_response,
             text=text,
-            latency=end_time-start_time,
+            latency=latency,
             num_token=completion_tokens,
         )
         
@@ -170,7 +360,7 @@ class REQUEST_LLM:
             raise TypeError("messages must be a list of dicts")
 
         payload = {
-            "model": self.model_path,
+            **self._payload_base,
             "messages": messages,
             "tools": tools,
             "tool_choice": "auto", 
@@ -178,61 +368,82 @@ class REQUEST_LLM:
             "max_tokens": max_tokens,
         }
 
-        start_time = time.time()
-        response = requests.post(
-            url=self.urls["chat"],
-            headers=self.headers,
-            json=payload,          # ✅ JSON body
-            timeout=72000,
+        api_response, latency, _, cache_key = self._post_cached(
+            self.urls["chat"], payload, temperature
         )
-        end_time = time.time()
-
-        response.raise_for_status()
-        api_response = response.json()
-        api_response_object = json.loads(json.dumps(api_response), object_hook=lambda d: SimpleNamespace(**d))
 
         try:
-            text = api_response_object.choices[0].message.content
-        except (KeyError, IndexError) as e:
+            text = api_response["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
             raise ValueError(
-                f"Unexpected chat completion response format: {api_response_object}"
+                f"Unexpected chat completion response format: {api_response}"
             ) from e
 
-        completion_tokens = api_response_object.usage.completion_tokens
+        completion_tokens = api_response["usage"]["completion_tokens"]
 
-        return SimpleNamespace(
-            object=api_response_object,
+        if cache_key is not None:
+            _RESPONSE_CACHE.put(cache_key, _json_dumps(api_response))
+
+        return LLMResponse(
             json=api_response,
             text=text,
-            latency=end_time-start_time,
+            latency=latency,
             num_token=completion_tokens,
         )
 
 
-    def num_tokens_from_prompt(self, prompt: str):
-        """Return the number of tokens used by a list of messages."""
+    def _count_locally(self, payload: dict) -> int | None:
+        """Count the tokens of a tokenize payload with the local tokenizer, or None if unavailable."""
 
-        payload = {
-            "model": self.model_path,
-            "prompt": prompt
-        }
-
-        response = requests.post(
-            url=self.urls["tokenize"], 
-            headers=self.headers, 
-            json=payload,
-            timeout=72000
-        )
+        if self.tokenizer is None:
+            return None
+        try:
+            if "prompt" in payload:
+                return len(self.tokenizer.encode(payload["prompt"]))
+            return len(self.tokenizer.apply_chat_template(
+                payload["messages"],
+                tools=payload.get("tools"),
+                tokenize=True,
+                add_generation_prompt=True,
+            ))
+        except Exception:
+            return None  # e.g. roles the chat template rejects; ask the server instead
+
+    def _tokenize(self, payload: dict) -> int:
+        """Return the token count of a tokenize payload, locally if possible, else via the server (memoized)."""
+
+        local_count = self._count_locally(payload)
+        if local_count is not None:
+            return local_count
+
+        key = LLMCache.cache_key(payload=payload)
+        cached = self._tok_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self._send(self.urls["tokenize"], payload)
 
         response.raise_for_status()
-        response_dict = response.json()
+        response_dict = _json_loads(response.content)
 
         if "count" not in response_dict:
             raise ValueError(
                 f"Tokenize API returned unexpected response: {response_dict}"
             )
 
-        return int(response_dict["count"])
+        token_count = int(response_dict["count"])
+        self._tok_cache.put(key, token_count)
+        return token_count
+
+    def num_tokens_from_prompt(self, prompt: str):
+        """Return the number of tokens used by a list of messages."""
+
+        payload = {
+            **self._payload_base,
+            "prompt": prompt
+        }
+
+        return self._tokenize(payload)
 
 
     def num_tokens_from_messages(self, messages: list[dict], quiet: bool = False) -> int:
@@ -242,30 +453,15 @@ class REQUEST_LLM:
             raise TypeError("messages must be a list of dicts")
 
         payload = {
-            "model": self.model_path,
+            **self._payload_base,
             "messages": messages,
         }
 
-        response = requests.post(
-            url=self.urls["tokenize"],
-            headers=self.headers,
-            json=payload,
-            timeout=72000,
-        )
-
-        response.raise_for_status()
-        response_dict = response.json()
-
-        if "count" not in response_dict:
-            raise ValueError(
-                f"Tokenize API returned unexpected response: {response_dict}"
-            )
-
-        token_count = int(response_dict["count"])
+        token_count = self._tokenize(payload)
 
         # DEBUG: Simple one-line output
         if not quiet:
-            print(f"[DEBUG] num_tokens_from_messages: model={self.model_path}, tokens={token_count}")
+            logger.debug("num_tokens_from_messages: model=%s, tokens=%d", self.model_path, token_count)
 
         return token_count
 
@@ -276,24 +472,9 @@ class REQUEST_LLM:
             raise TypeError("messages must be a list of dicts")
 
         payload = {
-            "model": self.model_path,
+            **self._payload_base,
             "messages": messages,
             "tools": tools,
         }
 
-        response = requests.post(
-            url=self.urls["tokenize"],
-            headers=self.headers,
-            json=payload,
-            timeout=72000,
-        )
-
-        response.raise_for_status()
-        response_dict = response.json()
-
-        if "count" not in response_dict:
-            raise ValueError(
-                f"Tokenize API returned unexpected response: {response_dict}"
-            )
-
-        return int(response_dict["count"])
\ No newline at end of file
+        return self._tokenize(payload)
\ No newline at end of file
@@ -3,14 +3,54 @@ from typing import Any, Dict, List, Tuple
 import requests
 import time
 import re
-from copy import deepcopy
+from bfcl_eval.model_handler.api_inference.utils.cache_utils import LLMCache
+
+SYSTEM_PROMPT_SELECTOR = """
+You are a tool selector for a function-calling agent.
+
+Task:
+Given a user message ([User Message]), the previous tool call([Tool Call]) and its results([Tool Execution Results], You must select a minimum of **3 distinct functions** from the provided list.
+
+Rules:
+- Output at least 3 function names, and no more than 10 functions.
+- Use ONLY names from the provided function list.
+- Output ONLY function names. No explanations or extra text.
+- Prioritize the [USER MESSAGE] above all else; use previous tool calls and results only as supplementary context.
+"""
+
+USER_PROMPT_SELECTOR = (
+    "Functions:\n"
+    "{functions}\n\n"
+    "{history}\n\n"
+    "Selected Functions:"
+)
+
+# Selections remembered per Selector, keyed by the prompt inputs that determine them
+SELECTOR_CACHE_SIZE = 256
+
+# Most tool execution results run_selector drops from the history to fit the context
+MAX_HISTORY_OMIT = 20
+
+# Candidate function names in selector output: word runs joined by "." or "-" (e.g. math.factorial),
+# never ending in punctuation so a name closing a sentence still matches
+_NAME_TOKEN = re.compile(r"\w+(?:[.-]\w+)*")
+
+# Splits a token into its word runs, keeping the "." / "-" joints
+_NAME_JOINT = re.compile(r"([.-])")
+
+# First line of the system message whose stripped text starts with "[" (the function definitions)
+_FUNCTIONS_LINE = re.compile(r"^[^\S\n]*\[", re.MULTILINE)
 
 class Selector():
 
-    def __init__(self, llm):
+    def __init__(self, llm, use_cache: bool = False):
         self.llm = llm
+        # Opt-in (DIFFUAGENT_CACHE): repeated (functions, history) inputs reuse the earlier selection
+        # and report the tokens it consumed, instead of calling the LLM again
+        self.use_cache = use_cache
+        self._cache = LLMCache(SELECTOR_CACHE_SIZE)
 
-    def build_selector_prompt(self, functions: List[Dict[str, Any]], user_message: List[Dict], history_omit: int=0) -> str:
+    def build_selector_prompt(self, functions: List[Dict[str, Any]], user_message: List[Dict], history_omit: int=0, functions_json: str=None) -> str:
         """
         Build a prompt for a tool-selector agent that selects functions that are potentially useful.
         2) missing: capabilities/tools that are not provided but might be needed (to help argue/justify)
@@ -25,33 +65,15 @@ class Selector():
         - "selected" may be [].
         - "missing" may be [].
         - "missing" MUST NOT include any function name that exists in the provided functions list.
+
+        functions_json, if given, is the precomputed output of _functions_json(functions).
         """
-        cleaned_functions = json.dumps(self._extract_function_meta(functions), ensure_ascii=False, indent=2)
+        cleaned_functions = functions_json if functions_json is not None else self._functions_json(functions)
         history = self._extract_history_str(user_message, omit=history_omit)
 
-        system_instructions = """
-You are a tool selector for a function-calling agent.
-
-Task:
-Given a user message ([User Message]), the previous tool call([Tool Call]) and its results([Tool Execution Results], You must select a minimum of **3 distinct functions** from the provided list.
-
-Rules:
-- Output at least 3 function names, and no more than 10 functions.
-- Use ONLY names from the provided function list.
-- Output ONLY function names. No explanations or extra text.
-- Prioritize the [USER MESSAGE] above all else; use previous tool calls and results only as supplementary context.
-"""
-
-        input_prompt = (
-            "Functions:\n"
-            "{functions}\n\n"
-            "{history}\n\n"
-            "Selected Functions:"
-        )
-
         message = [
-            {"role": "system", "content": system_instructions},
-            {"role": "user", "content": input_prompt.format(functions=cleaned_functions, history=history)}
+            {"role": "system", "content": SYSTEM_PROMPT_SELECTOR},
+            {"role": "user", "content": USER_PROMPT_SELECTOR.format(functions=cleaned_functions, history=history)}
         ]
 
         return message
@@ -65,22 +87,52 @@ Rules:
         if len(functions) <= 3: # disable selector if len(functions) <= 3.
             return [fun["name"] for fun in functions], 0
 
-        # length control
-        history_omit_num = 0
-        while history_omit_num <= 20:
-            selector_message = self.build_selector_prompt(
-                functions=functions,
-                user_message=user_message,
-                history_omit=history_omit_num
-            )
-
-            token_len = self.llm.num_tokens_from_messages(selector_message, quiet=True)
-
-            if token_len > self.llm.context_length:
-                print(f"context is cut!! original_length: {token_len}")
-                history_omit_num += 1
-            else:
-                break  # Core: stop once valid
+        # The function list is the same for every length-control attempt; serialize it once
+        functions_json = self._functions_json(functions)
+
+        history = self._extract_history_str(user_message)
+
+        cache_key = None
+        if self.use_cache:
+            cache_key = LLMCache.cache_key(functions=functions_json, history=history)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                selected_funcs, token = cached
+                return list(selected_funcs), token
+
+        # Built once; the length-control probes below only swap the user turn's content
+        selector_message = [
+            {"role": "system", "content": SYSTEM_PROMPT_SELECTOR},
+            {"role": "user", "content": USER_PROMPT_SELECTOR.format(functions=functions_json, history=history)}
+        ]
+        user_turn = selector_message[1]
+        token_len = self.llm.num_tokens_from_messages(selector_message, quiet=True)
+
+        # length control: omitting more tool results never lengthens the prompt, so binary search
+        # the fewest omissions that fit (about log2(MAX_HISTORY_OMIT) tokenizations instead of one each)
+        if token_len > self.llm.context_length:
+            print(f"context is cut!! original_length: {token_len}")
+            lo, hi = 1, MAX_HISTORY_OMIT
+            fit_content = None
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                user_turn["content"] = USER_PROMPT_SELECTOR.format(
+                    functions=functions_json,
+                    history=self._extract_history_str(user_message, omit=mid)
+                )
+                token_len = self.llm.num_tokens_from_messages(selector_message, quiet=True)
+
+                if token_len > self.llm.context_length:
+                    print(f"context is cut!! original_length: {token_len}")
+                    lo = mid + 1
+                else:
+                    fit_content = user_turn["content"]
+                    hi = mid - 1
+
+            # If nothing fits, the last probe (most history omitted) is already in place
+            if fit_content is not None:
+                user_turn["content"] = fit_content
+
         try:
             response = self.llm.chat_completion(selector_message, max_tokens=64, quiet=True)
             selected_funcs = self._post_process(response.text, functions)
@@ -90,6 +142,9 @@ Rules:
             print("selector calling failure. return no selection.")
             return [], 0
 
+        if cache_key is not None:
+            self._cache.put(cache_key, (tuple(selected_funcs), token))
+
         return selected_funcs, token
 
     def _post_process(self, response: str, functions):
@@ -98,9 +153,26 @@ Rules:
         Returns:
             selected_functions: List[str]
         """
-        
-        return [fun["name"] for fun in functions if fun['name'] in response]
+        names = [fun["name"] for fun in functions]
+        name_set = set(names)
+
+        # One scan of the response: every identifier-like token is looked up in the name set, together with
+        # its dotted/hyphenated sub-runs so "func" is still found inside "module.func"
+        found = set()
+        for token in _NAME_TOKEN.findall(response):
+            pieces = _NAME_JOINT.split(token)
+            for i in range(0, len(pieces), 2):
+                for j in range(i + 1, len(pieces) + 1, 2):
+                    candidate = "".join(pieces[i:j])
+                    if candidate in name_set:
+                        found.add(candidate)
+
+        return [name for name in names if name in found]
+
 
+    def _functions_json(self, functions) -> str:
+        """Serialized {name, description} list shown to the selector."""
+        return json.dumps(self._extract_function_meta(functions), ensure_ascii=False, indent=2)
 
     def _extract_function_meta(self, functions):
         """
@@ -117,11 +189,11 @@ Rules:
         ]
 
     def _extract_history_str(self, message, omit: int = 0):
-        history_str = ""
+        parts = []
         skipped_tool_results = 0  # Number of ignored tool execution results
 
         for m in message:
-            content = m["content"] if len(m["content"]) < 512 else m["content"][:512] # cut content length
+            content = m["content"][:512] # cut content length
 
             # ---- Tool execution result ----
             if m["role"] == "user" and "[Tool Execution Result]" in content:
@@ -129,34 +201,36 @@ Rules:
                     skipped_tool_results += 1
                     continue  # Ignore the first omit tool results
 
-                history_str += (
+                parts.append(
                     content
                     .strip()
-                    .rstrip("Please modify the functions or parameters based on this.")
-                    + "\n"
+                    .removesuffix("Please modify the functions or parameters based on this.")
+                    .rstrip()
                 )
+                parts.append("\n")
 
             # ---- Normal user message ----
             elif m["role"] == "user":
-                history_str = "[User Message]\n" + content + "\n\n"
+                parts = ["[User Message]\n", content, "\n\n"]  # a new user turn restarts the history
 
             # ---- Assistant tool call ----
             elif m["role"] == "assistant":
-                history_str += "[Tool Call]\n" + content.split("\n")[0] + "\n"  # Only take the first line, prevent main Agent from being too long and causing OOM
+                parts.extend(("[Tool Call]\n", content.split("\n")[0], "\n"))  # Only take the first line, prevent main Agent from being too long and causing OOM
 
-        return history_str
+        return "".join(parts)
 
 def filter_message(message: dict, functions: list, selected_funcs: list):
     instruction, _functions = split_system_message(message)
     instruction += "\nYou must NOT include <think> or any reasoning. Your response must ONLY contain a list of function calls in the required format."
 
-    message_new = deepcopy(message)
+    # Only the first message is rewritten; the rest are shared with the original list
+    message_new = list(message)
 
     if len(selected_funcs) > 0:
         functions_return = filter_func(functions, selected_funcs)
-        message_new[0]["content"] = instruction + "\n" + str(functions_return) + "\n"
+        message_new[0] = {**message[0], "content": instruction + "\n" + str(functions_return) + "\n"}
     else:
-        message_new[0]["content"] = instruction + "\n" + _functions + "\n" # keep original
+        message_new[0] = {**message[0], "content": instruction + "\n" + _functions + "\n"} # keep original
 
     return message_new
 
@@ -166,18 +240,15 @@ def filter_func(functions: list, selected_funcs: list=[]):
 def split_system_message(message: dict):
 
     def split_by_target_line(text: str):
-        lines = text.split("\n")
-
-        for i, line in enumerate(lines):
-            # Look for the start of function definitions array
-            # Handle cases where "[" might have leading whitespace
-            stripped_line = line.strip()
-            if stripped_line.startswith("[") or stripped_line.startswith("[{"):
-                before = "\n".join(lines[:i])
-                after = "\n".join(lines[i:])
-                return before, after
-
-        raise ValueError("No line starting with '[' (function definitions) found")
+        # Look for the start of function definitions array
+        # Handle cases where "[" might have leading whitespace
+        match = _FUNCTIONS_LINE.search(text)
+        if match is None:
+            raise ValueError("No line starting with '[' (function definitions) found")
+
+        start = match.start()
+        before = text[:start - 1] if start else ""  # drop the newline ending the previous line
+        return before, text[start:]
 
     # cut system message
     for m in message:
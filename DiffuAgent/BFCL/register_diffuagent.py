@@ -7,12 +7,24 @@ Run this script to apply the DiffuAgent model registration patch.
 
 import os
 import sys
+import glob
 import shutil
 from datetime import datetime
 
 
 def backup_file(filepath):
-    """Backup a file with timestamp."""
+    """
+    Backup a file with timestamp.
+
+    If the newest existing backup still matches the file (copy2 preserves the
+    mtime, so the timestamps are equal), it is reused instead of writing another copy.
+    """
+    backups = glob.glob(f"{glob.escape(filepath)}.backup.*")
+    if backups:
+        latest = max(backups)  # names end in a sortable %Y%m%d_%H%M%S stamp
+        if os.path.getmtime(latest) >= os.path.getmtime(filepath):
+            return latest
+
     backup_path = f"{filepath}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     shutil.copy2(filepath, backup_path)
     return backup_path
@@ -36,38 +48,39 @@ def register_diffuagent():
     print(f"✓ Found {model_config_path}")
     print()
 
-    # Backup original file
-    print("[Step 1] Backing up original file...")
-    backup_path = backup_file(model_config_path)
-    print(f"✓ Backed up to: {backup_path}")
-    print()
-
     # Read the file
     with open(model_config_path, 'r') as f:
         content = f.read()
 
-    # Check if already registered
+    # Check if already registered (re-runs need no new backup)
     if 'diffuagent_model_map' in content:
         print("⚠ DiffuAgent models already registered")
         print("Skipping registration...")
         print()
         return True
 
+    # Backup original file
+    print("[Step 1] Backing up original file...")
+    backup_path = backup_file(model_config_path)
+    print(f"✓ Backed up to: {backup_path}")
+    print()
+
     # Find MODEL_CONFIG_MAPPING line
     print("[Step 2] Adding DiffuAgent registration...")
-    lines = content.split('\n')
-    model_config_idx = None
-
-    for i, line in enumerate(lines):
-        if line.startswith('MODEL_CONFIG_MAPPING = {'):
-            model_config_idx = i
-            break
-
-    if model_config_idx is None:
+    marker = 'MODEL_CONFIG_MAPPING = {'
+    if content.startswith(marker):
+        model_config_pos = 0
+    else:
+        model_config_pos = content.find('\n' + marker)
+        if model_config_pos != -1:
+            model_config_pos += 1
+
+    if model_config_pos == -1:
         print("❌ ERROR: Cannot find MODEL_CONFIG_MAPPING")
         return False
 
-    print(f"  Found MODEL_CONFIG_MAPPING at line {model_config_idx + 1}")
+    model_config_line = content.count('\n', 0, model_config_pos) + 1
+    print(f"  Found MODEL_CONFIG_MAPPING at line {model_config_line}")
 
     # Prepare the registration code
     registration_code = '''
@@ -76,29 +89,32 @@ from bfcl_eval.build_handlers_diffuagent import add_diffuagent_model_configs
 diffuagent_model_map = add_diffuagent_model_configs()
 '''
 
-    # Insert registration code before MODEL_CONFIG_MAPPING
-    lines.insert(model_config_idx, registration_code.strip())
-
-    # Add **diffuagent_model_map to the merge
-    # Find the MODEL_CONFIG_MAPPING line again (it moved)
-    for i, line in enumerate(lines):
-        if line.startswith('MODEL_CONFIG_MAPPING = {'):
-            model_config_idx = i
-            # Check if next line has the merge
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                # Check if diffuagent is already in the merge
-                if 'diffuagent_model_map' not in next_line:
-                    # Insert **diffuagent_model_map at the start of the merge
-                    lines[i + 1] = lines[i + 1].replace(
-                        '**api_inference_model_map,',
-                        '**diffuagent_model_map,\n    **api_inference_model_map,'
-                    )
-            break
+    # Add **diffuagent_model_map at the start of the merge on the line after MODEL_CONFIG_MAPPING
+    merge_start = content.find('\n', model_config_pos) + 1
+    if merge_start:
+        merge_end = content.find('\n', merge_start)
+        if merge_end == -1:
+            merge_end = len(content)
+        merge_line = content[merge_start:merge_end].replace(
+            '**api_inference_model_map,',
+            '**diffuagent_model_map,\n    **api_inference_model_map,'
+        )
+    else:
+        merge_start = merge_end = len(content)
+        merge_line = ''
+
+    # Insert registration code before MODEL_CONFIG_MAPPING, splicing the file in one pass
+    content = (
+        content[:model_config_pos]
+        + registration_code.strip() + '\n'
+        + content[model_config_pos:merge_start]
+        + merge_line
+        + content[merge_end:]
+    )
 
     # Write back
     with open(model_config_path, 'w') as f:
-        f.write('\n'.join(lines))
+        f.write(content)
 
     print("✓ Added DiffuAgent registration")
     print()
@@ -0,0 +1,19 @@
+"""Test double for the LLM/DLLM backends used by Selector and Format_Editor."""
+from types import SimpleNamespace
+
+
+class CharCountBackend:
+    """Backend whose token count is the number of characters in the messages."""
+
+    def __init__(self, context_length, reply="UNCHANGED", num_token=7):
+        self.context_length = context_length
+        self.reply = reply
+        self.num_token = num_token
+        self.sent = []
+
+    def num_tokens_from_messages(self, messages, quiet=False):
+        return sum(len(m["content"]) for m in messages)
+
+    def chat_completion(self, messages, max_tokens=256, quiet=False):
+        self.sent.append([dict(m) for m in messages])
+        return SimpleNamespace(text=self.reply, num_token=self.num_token)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# BFCL and Agentboard are run from their own directories rather than installed;
+# put both on the path so their top-level packages import as they do there.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("BFCL", "Agentboard"):
+    path = os.path.join(ROOT, "DiffuAgent", sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
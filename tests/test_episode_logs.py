@@ -0,0 +1,93 @@
+"""Per-episode buffering of task logger output (EpisodeLogBuffer / buffered_episode_logs)."""
+import logging
+import threading
+import time
+
+import pytest
+
+# The enhanced tasks import the rest of AgentBoard (base_task, common, environments)
+base_enhanced = pytest.importorskip("tasks.enhanced.base_enhanced")
+EpisodeLogBuffer = base_enhanced.EpisodeLogBuffer
+buffered_episode_logs = base_enhanced.buffered_episode_logs
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _task_logger(name, *handlers):
+    task_logger = logging.getLogger(name)
+    task_logger.handlers = list(handlers)
+    task_logger.setLevel(logging.DEBUG)
+    task_logger.propagate = False
+    return task_logger
+
+
+def test_concurrent_episodes_flush_contiguous_ordered_blocks():
+    sink = ListHandler()
+    task_logger = _task_logger("test_episode_logs.concurrent", sink)
+    num_episodes, num_records = 6, 5
+    start = threading.Barrier(num_episodes)
+
+    def episode(i):
+        start.wait()
+        with buffered_episode_logs(task_logger):
+            for step in range(num_records):
+                task_logger.info("episode %d step %d", i, step)
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=episode, args=(i,)) for i in range(num_episodes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(sink.messages) == num_episodes * num_records
+    blocks = [sink.messages[i:i + num_records] for i in range(0, len(sink.messages), num_records)]
+    seen = set()
+    for block in blocks:
+        episode_id = block[0].split()[1]
+        assert block == [f"episode {episode_id} step {step}" for step in range(num_records)]
+        seen.add(episode_id)
+    assert len(seen) == num_episodes
+
+
+def test_records_are_held_until_the_episode_ends():
+    sink = ListHandler()
+    task_logger = _task_logger("test_episode_logs.held", sink)
+
+    with buffered_episode_logs(task_logger):
+        task_logger.info("first")
+        task_logger.info("second")
+        assert sink.messages == []
+
+    assert sink.messages == ["first", "second"]
+
+
+def test_records_outside_an_episode_pass_through():
+    sink = ListHandler()
+    task_logger = _task_logger("test_episode_logs.passthrough", sink)
+    with buffered_episode_logs(task_logger):
+        pass
+
+    task_logger.info("outside")
+
+    assert sink.messages == ["outside"]
+    assert [type(h) for h in task_logger.handlers] == [EpisodeLogBuffer]
+
+
+def test_target_levels_are_respected():
+    everything, warnings = ListHandler(), ListHandler(logging.WARNING)
+    task_logger = _task_logger("test_episode_logs.levels", everything, warnings)
+
+    with buffered_episode_logs(task_logger):
+        task_logger.info("info")
+        task_logger.warning("warning")
+
+    assert everything.messages == ["info", "warning"]
+    assert warnings.messages == ["warning"]
@@ -0,0 +1,38 @@
+"""Format editor response trimming."""
+import pytest
+
+from bfcl_eval.model_handler.api_inference.utils.fmeditor_utils import (
+    USER_PROMPT_EDITOR,
+    Format_Editor,
+)
+
+from backends import CharCountBackend
+
+
+def _expected_editor_response(response, context_length):
+    """Longest line prefix that fits, dropping one trailing line at a time."""
+    system_len = len(Format_Editor(None).build_editor_prompt([], "")[0]["content"])
+    lines = response.split("\n")
+    while len(lines) > 1:
+        candidate = "\n".join(lines)
+        if system_len + len(USER_PROMPT_EDITOR.format(response=candidate)) <= context_length:
+            return candidate
+        lines = lines[:-1]
+    return lines[0]
+
+
+@pytest.mark.parametrize("context_length", [10, 2000, 2300, 2600, 3100, 4000, 5000])
+def test_run_formateditor_keeps_longest_fitting_prefix(context_length):
+    response = "\n".join(f"line {i}: " + "y" * (i * 7) for i in range(30))
+    backend = CharCountBackend(context_length, reply="UNCHANGED")
+
+    result = Format_Editor(backend).run_formateditor([], [], response)
+
+    expected = _expected_editor_response(response, context_length)
+    assert result == expected
+    assert backend.sent[-1][1]["content"] == USER_PROMPT_EDITOR.format(response=expected)
+
+
+def test_run_formateditor_returns_repaired_call():
+    backend = CharCountBackend(10 ** 6, reply='[cd(folder="x")]')
+    assert Format_Editor(backend).run_formateditor([], [], '```cd(folder="x")```') == '[cd(folder="x")]'
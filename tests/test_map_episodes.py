@@ -0,0 +1,73 @@
+"""Concurrent episode evaluation with BaseEnhancedTask.map_episodes."""
+import random
+import threading
+import time
+
+import pytest
+
+# The enhanced tasks import the rest of AgentBoard (base_task, common, environments)
+base_enhanced = pytest.importorskip("tasks.enhanced.base_enhanced")
+
+
+class WorkerPoolTask(base_enhanced.BaseEnhancedTask):
+    """Task whose workers are plain objects; records which worker ran which job."""
+
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self.built = []
+        self._busy = set()
+        self._busy_lock = threading.Lock()
+        self.overlaps = 0
+
+    def build_worker(self):
+        worker = object()
+        self.built.append(worker)
+        return worker
+
+    def run(self, job, worker):
+        with self._busy_lock:
+            if id(worker) in self._busy:
+                self.overlaps += 1
+            self._busy.add(id(worker))
+        time.sleep(random.uniform(0, 0.01))
+        with self._busy_lock:
+            self._busy.discard(id(worker))
+        return job * 10, worker
+
+
+@pytest.mark.parametrize("num_workers", [2, 4, 16])
+def test_results_follow_job_order(num_workers):
+    task = WorkerPoolTask(num_workers)
+    jobs = list(range(40))
+
+    results = list(task.map_episodes(task.run, jobs, worker="main"))
+
+    assert [value for value, _ in results] == [job * 10 for job in jobs]
+    assert task.overlaps == 0
+    assert len(task.built) == min(num_workers, len(jobs)) - 1
+    assert {worker for _, worker in results} <= {"main", *task.built}
+
+
+def test_single_worker_runs_inline():
+    task = WorkerPoolTask(1)
+    caller = threading.current_thread()
+    threads = []
+
+    def fn(job, worker):
+        threads.append(threading.current_thread())
+        return job, worker
+
+    results = list(task.map_episodes(fn, iter([3, 1, 2]), worker="main"))
+
+    assert results == [(3, "main"), (1, "main"), (2, "main")]
+    assert threads == [caller] * 3
+    assert task.built == []
+
+
+def test_workers_capped_by_job_count():
+    task = WorkerPoolTask(8)
+
+    results = list(task.map_episodes(task.run, [5, 6, 7], worker="main"))
+
+    assert [value for value, _ in results] == [50, 60, 70]
+    assert len(task.built) == 2
@@ -0,0 +1,77 @@
+"""Retry policy of the pooled LLM/DLLM sessions, exercised against a local HTTP server."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from bfcl_eval.model_handler.api_inference.utils import request_dllm, request_llm
+
+SESSIONS = {"llm": request_llm._SESSION, "dllm": request_dllm._SESSION}
+
+
+class CountingServer:
+    """Answers every POST with a fixed status (optionally after a delay) and counts the requests."""
+
+    def __init__(self, status, delay=0.0):
+        self.hits = 0
+        counter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                counter.hits += 1
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if delay:
+                    time.sleep(delay)
+                body = b'{"ok": true}'
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up after its read timeout
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.mark.parametrize("backend", sorted(SESSIONS))
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_server_errors_are_not_replayed(backend, status):
+    with CountingServer(status) as server:
+        response = SESSIONS[backend].post(server.url, data=b"{}", timeout=(5, 5))
+    assert response.status_code == status
+    assert server.hits == 1
+
+
+@pytest.mark.parametrize("backend", sorted(SESSIONS))
+def test_read_timeout_is_not_retried(backend):
+    with CountingServer(200, delay=0.5) as server:
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            SESSIONS[backend].post(server.url, data=b"{}", timeout=(5, 0.1))
+        time.sleep(0.6)
+    assert server.hits == 1
+
+
+@pytest.mark.parametrize("backend", sorted(SESSIONS))
+@pytest.mark.parametrize("status", [429, 503])
+def test_unprocessed_requests_are_retried(backend, status):
+    with CountingServer(status) as server:
+        response = SESSIONS[backend].post(server.url, data=b"{}", timeout=(5, 5))
+    assert response.status_code == status
+    assert server.hits == 4  # the request plus three retries
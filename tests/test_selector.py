@@ -0,0 +1,118 @@
+"""Selector output parsing, history length control and selection cache."""
+import pytest
+
+from bfcl_eval.model_handler.api_inference.utils.selector_utils import (
+    MAX_HISTORY_OMIT,
+    USER_PROMPT_SELECTOR,
+    Selector,
+)
+
+from backends import CharCountBackend
+
+
+def _functions(*names):
+    return [{"name": name, "description": f"{name} tool"} for name in names]
+
+
+# ---- Selector._post_process ----
+
+def test_post_process_keeps_function_list_order():
+    functions = _functions("get_weather", "book_flight", "cancel_flight")
+    selected = Selector(None)._post_process("cancel_flight, get_weather", functions)
+    assert selected == ["get_weather", "cancel_flight"]
+
+
+def test_post_process_ignores_names_only_present_as_substrings_of_words():
+    functions = _functions("get", "get_weather")
+    assert Selector(None)._post_process("get_weather", functions) == ["get_weather"]
+
+
+def test_post_process_matches_dotted_and_hyphenated_names():
+    functions = _functions("math.factorial", "get-weather", "factorial", "unused")
+    selected = Selector(None)._post_process("math.factorial and get-weather.", functions)
+    assert selected == ["math.factorial", "get-weather", "factorial"]
+
+
+def test_post_process_finds_names_inside_dotted_tokens():
+    functions = _functions("func", "module", "other")
+    assert Selector(None)._post_process("call module.func", functions) == ["func", "module"]
+
+
+def test_post_process_without_matches():
+    assert Selector(None)._post_process("nothing relevant", _functions("a_tool", "b_tool")) == []
+
+
+# ---- Selector.run_selector length control ----
+
+def _history(num_results):
+    message = [{"role": "user", "content": "please do the thing"}]
+    for i in range(num_results):
+        message.append({"role": "assistant", "content": f"call_{i}()"})
+        message.append({"role": "user", "content": f"[Tool Execution Result] {'x' * 200} result {i}"})
+    return message
+
+
+def _expected_selector_content(selector, functions, message, context_length):
+    """Fewest omitted tool results that fit, as the original one-by-one loop chose them."""
+    functions_json = selector._functions_json(functions)
+    system_len = len(selector.build_selector_prompt(functions, message)[0]["content"])
+    content = None
+    for omit in range(1, MAX_HISTORY_OMIT + 1):
+        content = USER_PROMPT_SELECTOR.format(
+            functions=functions_json,
+            history=selector._extract_history_str(message, omit=omit),
+        )
+        if system_len + len(content) <= context_length:
+            break
+    return content
+
+
+@pytest.mark.parametrize("context_length", [10, 1600, 3400, 4300, 5000, 6000, 7100, 10 ** 6])
+def test_run_selector_omits_fewest_tool_results_that_fit(context_length):
+    functions = _functions("alpha", "beta", "gamma", "delta")
+    message = _history(25)
+    backend = CharCountBackend(context_length, reply="beta, delta")
+    selector = Selector(backend)
+
+    selected, token = selector.run_selector(functions, message)
+
+    assert selected == ["beta", "delta"]
+    assert token == backend.num_token
+    sent_content = backend.sent[-1][1]["content"]
+    full_content = selector.build_selector_prompt(functions, message)[1]["content"]
+    if len(backend.sent[-1][0]["content"]) + len(full_content) <= context_length:
+        assert sent_content == full_content
+    else:
+        assert sent_content == _expected_selector_content(selector, functions, message, context_length)
+
+
+def test_run_selector_skips_backend_for_three_functions_or_fewer():
+    backend = CharCountBackend(10)
+    selected, token = Selector(backend).run_selector(_functions("a", "b", "c"), _history(1))
+    assert (selected, token) == (["a", "b", "c"], 0)
+    assert backend.sent == []
+
+
+def test_run_selector_cache_reports_original_tokens():
+    functions = _functions("alpha", "beta", "gamma", "delta")
+    message = _history(2)
+    backend = CharCountBackend(10 ** 6, reply="gamma", num_token=11)
+    selector = Selector(backend, use_cache=True)
+
+    first = selector.run_selector(functions, message)
+    second = selector.run_selector(functions, message)
+
+    assert first == second == (["gamma"], 11)
+    assert len(backend.sent) == 1
+
+
+def test_run_selector_cache_is_off_by_default():
+    functions = _functions("alpha", "beta", "gamma", "delta")
+    message = _history(2)
+    backend = CharCountBackend(10 ** 6, reply="gamma")
+    selector = Selector(backend)
+
+    selector.run_selector(functions, message)
+    selector.run_selector(functions, message)
+
+    assert len(backend.sent) == 2
@@ -0,0 +1,63 @@
+"""Brace-balanced scanning of `name({...})` tool calls in model output."""
+import pytest
+
+# llm_utils imports transformers at module level for its model/tokenizer helpers
+pytest.importorskip("transformers")
+
+from bfcl_eval.model_handler.api_inference.utils.llm_utils import (
+    _iter_tool_calls,
+    _scan_json_object,
+    ministral_toolcalls_to_bfcl,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": 1}', 8),
+        ('{"a": {"b": {"c": 2}}} tail', 22),
+        ('{"s": "}{ not braces"}', 22),
+        ('{"s": "escaped \\" } quote"}', 27),
+        ('{"a": {"b": 1}', -1),
+        ('{"s": "}"', -1),
+    ],
+)
+def test_scan_json_object(text, expected):
+    assert _scan_json_object(text, 0) == expected
+
+
+def test_scan_json_object_from_offset():
+    text = 'f({"x": [1, {"y": 2}]})'
+    assert text[2:_scan_json_object(text, 2)] == '{"x": [1, {"y": 2}]}'
+
+
+def test_iter_tool_calls_nested_and_multiple():
+    text = 'a({"q": {"r": 1}}) b ( {"s": "x)"} ) c({})'
+    assert list(_iter_tool_calls(text)) == [
+        ("a", '{"q": {"r": 1}}'),
+        ("b", '{"s": "x)"}'),
+        ("c", "{}"),
+    ]
+
+
+def test_iter_tool_calls_skips_calls_without_object_or_closing_paren():
+    text = 'skip(1) half({"a": 1} ok({"b": 2})'
+    assert list(_iter_tool_calls(text)) == [("ok", '{"b": 2}')]
+
+
+def test_iter_tool_calls_continues_after_unterminated_arguments():
+    text = 'broken({"a": 1, good({"b": 2}) after({"c": 3})'
+    assert list(_iter_tool_calls(text)) == [("good", '{"b": 2}'), ("after", '{"c": 3}')]
+
+
+def test_iter_tool_calls_truncated_output():
+    assert list(_iter_tool_calls('done({"a": 1}) cut({"b": [1, 2')) == [("done", '{"a": 1}')]
+
+
+def test_ministral_toolcalls_to_bfcl():
+    text = '[TOOL_CALLS]find_concert({"location": "Chicago, IL", "price": 100, "rock": true})'
+    assert ministral_toolcalls_to_bfcl(text) == '[find_concert(location="Chicago, IL", price=100, rock=True)]'
+
+
+def test_ministral_toolcalls_to_bfcl_without_calls():
+    assert ministral_toolcalls_to_bfcl("no calls here") == "[]"